@@ -396,6 +396,7 @@ extern int get_py_progname(char **);
 #define ITER_RESERVATIONS	"resvs"
 #define ITER_VNODES           "vnodes"
 #define PY_LOGJOBMSG_METHOD	"logjobmsg"
+#define PY_WILL_LOG_EVENT_METHOD	"will_log_event"
 #define PY_REBOOT_HOST_METHOD	"reboot"
 #define PY_SCHEDULER_RESTART_CYCLE_METHOD	"scheduler_restart_cycle"
 #define PY_SET_PBS_STATOBJ_METHOD	"set_pbs_statobj"
@@ -407,6 +408,14 @@ extern int get_py_progname(char **);
 #define PY_GET_SERVER_DATA_FP_METHOD	"get_server_data_fp"
 #define PY_GET_SERVER_DATA_FILE_METHOD	"get_server_data_file"
 #define PY_USE_STATIC_DATA_METHOD	"use_static_data"
+#define PY_GET_STATIC_DATA_FILE_METHOD	"get_static_data_file"
+
+/*
+ * Leading bytes of a hook data file in the binary format written by the
+ * pbs.v1 module (see pbs/v1/_hook_data.py), which decodes such a file on
+ * demand instead of it being loaded by pbs_python.
+ */
+#define HOOK_DATA_BINARY_MAGIC		"PBSHOOKDATA\001\n"
 
 /* Event parameter names */
 #define	PBS_OBJ			"pbs"
@@ -573,6 +582,9 @@ pbs_python_get_hook_debug_data_file(void);
 extern void
 pbs_python_set_use_static_data_value(int);
 
+extern void
+pbs_python_set_static_data_file(char *);
+
 extern void
 pbs_python_set_server_info(pbs_list_head *);
 
@@ -80,6 +80,9 @@
 /* this is the dictionary containing all the types for the embedded interp */
 #define   PBS_PYTHON_V1_TYPES_DICTIONARY   "EXPORTED_TYPES_DICT"
 
+/* releases the bookkeeping kept for the previous event's python objects */
+#define   PBS_PYTHON_V1_RELEASE_EVENT_OBJECTS   "_release_event_objects"
+
 /*             BEGIN CONVENIENCE LOGGING MACROS                              */
 
 /* Assumptions:
@@ -41,6 +41,23 @@
 
 %{
 #include "pbs_ifl.h"
+#include "pbs_error.h"
 %}
 
 %include "pbs_ifl.h"
+
+/*
+ * pbs_errno is a macro over a per-thread location, which cannot be wrapped
+ * as a variable, so it is read through pbs_get_errno().
+ */
+%inline %{
+int
+pbs_get_errno(void)
+{
+	return pbs_errno;
+}
+%}
+
+%constant int PBSE_PROTOCOL = PBSE_PROTOCOL;
+%constant int PBSE_NOCONNECTS = PBSE_NOCONNECTS;
+%constant int PBSE_NOSERVER = PBSE_NOSERVER;
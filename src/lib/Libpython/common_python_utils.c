@@ -798,6 +798,57 @@ pbsv1mod_meth_logmsg(PyObject *self, PyObject *args, PyObject *kwds)
 		severity, pbs_python_daemon_name, emsg);
 	Py_RETURN_NONE;
 }
+
+/*
+ * will_log_event module method implementation and documentation
+ *
+ */
+
+const char pbsv1mod_meth_will_log_event_doc[] =
+"will_log_event(loglevel)\n\
+  where:\n\
+\n\
+   loglevel: one of the values accepted by logmsg()\n\
+\n\
+  returns:\n\
+         True if logmsg() would write a message at 'loglevel' to the log,\n\
+         so that a hook can skip building messages that would be dropped\n\
+";
+
+PyObject *
+pbsv1mod_meth_will_log_event(PyObject *self, PyObject *args, PyObject *kwds)
+{
+
+	static char *kwlist[] = {"loglevel", NULL};
+
+	int   loglevel;
+	int   eventtype;
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwds,
+		"i:will_log_event",
+		kwlist,
+		&loglevel
+		)
+		) {
+		return NULL;
+	}
+
+	if (!VALID_SEVERITY_VALUE(loglevel) &&
+		!VALID_EVENTTYPE_VALUE(loglevel)) {
+		PyErr_Format(PyExc_TypeError, "Invalid severity or eventtype value <%d>",
+			loglevel);
+		return NULL;
+	}
+	/* same event type as pbsv1mod_meth_logmsg() logs with */
+	if (VALID_EVENTTYPE_VALUE(loglevel))
+		eventtype = loglevel;
+	else
+		eventtype = (PBSEVENT_ADMIN | PBSEVENT_SYSTEM);
+
+	if (will_log_event(eventtype))
+		Py_RETURN_TRUE;
+	Py_RETURN_FALSE;
+}
 #undef  VALID_SEVERITY_VALUE
 
 /*
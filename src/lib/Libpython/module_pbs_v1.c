@@ -80,6 +80,10 @@ extern PyObject * pbsv1mod_meth_logjobmsg(PyObject *self,
 	PyObject *args, PyObject *kwds
 	);
 
+extern char pbsv1mod_meth_will_log_event_doc[]; /* common_python_utils.c */
+extern PyObject * pbsv1mod_meth_will_log_event(PyObject *self,
+	PyObject *args, PyObject *kwds);
+
 /* pbs_python_svr_internal.c */
 extern char pbsv1mod_meth_get_queue_doc[];
 extern PyObject * pbsv1mod_meth_get_queue(PyObject *self,
@@ -248,6 +252,9 @@ extern PyObject *pbsv1mod_meth_get_server_data_file(void);
 extern char pbsv1mod_meth_use_static_data_doc[];
 extern PyObject *pbsv1mod_meth_use_static_data(void);
 
+extern char pbsv1mod_meth_get_static_data_file_doc[];
+extern PyObject *pbsv1mod_meth_get_static_data_file(void);
+
 
 /* private */
 static PyObject *PyPbsV1ModuleExtension_Obj = NULL; /* BORROWED reference */
@@ -573,6 +580,8 @@ static PyMethodDef pbs_v1_module_methods[] = {
 		METH_VARARGS | METH_KEYWORDS, pbsv1mod_meth_logmsg_doc},
 	{PY_LOGJOBMSG_METHOD, (PyCFunction) pbsv1mod_meth_logjobmsg,
 		METH_VARARGS | METH_KEYWORDS, pbsv1mod_meth_logjobmsg_doc},
+	{PY_WILL_LOG_EVENT_METHOD, (PyCFunction) pbsv1mod_meth_will_log_event,
+		METH_VARARGS | METH_KEYWORDS, pbsv1mod_meth_will_log_event_doc},
 	{PY_GET_PYTHON_DAEMON_NAME_METHOD,
 		(PyCFunction) pbsv1mod_meth_get_python_daemon_name,
 		METH_NOARGS, pbsv1mod_meth_get_python_daemon_name_doc},
@@ -622,6 +631,9 @@ static PyMethodDef pbs_v1_module_methods[] = {
 	{PY_USE_STATIC_DATA_METHOD,
 		(PyCFunction) pbsv1mod_meth_use_static_data,
 		METH_NOARGS, pbsv1mod_meth_use_static_data_doc},
+	{PY_GET_STATIC_DATA_FILE_METHOD,
+		(PyCFunction) pbsv1mod_meth_get_static_data_file,
+		METH_NOARGS, pbsv1mod_meth_get_static_data_file_doc},
 	{PY_GET_PBS_CONF_METHOD,
 		(PyCFunction) pbsv1mod_meth_get_pbs_conf,
 		METH_NOARGS, pbsv1mod_meth_get_pbs_conf_doc},
@@ -309,6 +309,7 @@ typedef struct hook_debug_t {
 } hook_debug_t;
 
 static	int	use_static_data = 0;	/* use static server-related data */
+static	char	static_data_file[MAXPATHLEN + 1] = {'\0'}; /* binary data file */
 
 static	hook_debug_t	hook_debug;
 
@@ -5203,6 +5204,18 @@ _pbs_python_event_set(unsigned int hook_event, char *req_user, char *req_host,
 		}
 	}
 
+	/* Let go of the per object bookkeeping (attributes set in hook, */
+	/* unknown resources) still referencing the previous objects.    */
+	if (PyPbsV1Module_Obj != NULL) {
+		PyObject *py_ret;
+
+		py_ret = PyObject_CallMethod(PyPbsV1Module_Obj,
+			PBS_PYTHON_V1_RELEASE_EVENT_OBJECTS, NULL); /* NEW */
+		if (py_ret == NULL)
+			pbs_python_write_error_to_log(__func__);
+		Py_XDECREF(py_ret);
+	}
+
 	lval = max_hooks;
 	if (is_sattr_set(SVR_ATR_PythonRestartMaxHooks))
 		max_hooks = get_sattr_long(SVR_ATR_PythonRestartMaxHooks);
@@ -11828,6 +11841,41 @@ pbs_python_set_use_static_data_value(int value)
 	use_static_data = value;
 }
 
+const char pbsv1mod_meth_get_static_data_file_doc[] =
+"get_static_data_file()\n\
+\n\
+  returns:\n\
+         the pathname to the static server data file if it is in the binary\n\
+         format decoded by the pbs.v1 module, None otherwise.\n\
+  	 This is an internal function.\n\
+";
+
+/**
+ * @brief
+ *	Returns the Python string representing the pathname to the static
+ *	server data file in binary format, or None if not set.
+ */
+PyObject *
+pbsv1mod_meth_get_static_data_file(void)
+{
+	if (!use_static_data || (static_data_file[0] == '\0')) {
+		Py_RETURN_NONE;
+	}
+	return (PyUnicode_FromString(static_data_file));
+}
+
+/**
+ * @brief
+ *	set the static server data file in binary format, whose contents
+ *	are decoded by the pbs.v1 module.
+ */
+void
+pbs_python_set_static_data_file(char *filename)
+{
+	if (filename != NULL)
+		snprintf(static_data_file, sizeof(static_data_file), "%s", filename);
+}
+
 
 /**
  * @brief
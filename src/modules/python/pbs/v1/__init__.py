@@ -50,6 +50,8 @@ from _pbs_v1 import *
 from ._base_types import *
 from ._exc_types import *
 from ._svr_types import *
+#: used by the embedded interpreter to release per event objects
+from ._svr_types import _release_event_objects
 
 #: this is Power Management Infrastructure which may not exist on all system types yet
 try:
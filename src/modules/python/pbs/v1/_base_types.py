@@ -99,9 +99,12 @@ __all__ = ['_generic_attr',
 import _pbs_v1
 import sys
 import math
+import re
 _size = _pbs_v1.svr_types._size
 _LOG = _pbs_v1.logmsg
 _IS_SETTABLE = _pbs_v1.is_attrib_val_settable
+#: prefix of the instance dictionary keys holding PbsAttributeDescriptor values
+_PER_INSTANCE_KEY_PREFIX = "_pbs_attr:"
 
 
 class PbsAttributeDescriptor():
@@ -114,7 +117,8 @@ class PbsAttributeDescriptor():
       - Add the attribute name to the dictionary 'attributes' on the instance if
         it exists.
       - Since a Descriptor is a class level object, to maintain unique values
-        across instances, we maintain an internal dictionary.
+        across instances, the value is kept in the instance's own dictionary
+        under a private key, so that it is released along with the instance.
     """
 
     def __init__(self, cls, name, default_value, value_type=None, resc_attr=None, is_entity=0):
@@ -150,8 +154,9 @@ class PbsAttributeDescriptor():
 
         __attributes = getattr(cls, _ATTRIBUTES_KEY_NAME)
         __attributes[name] = None
-        #: now we need to maintain a unique value for each object
-        self.__per_instance = {}
+        #: now we need to maintain a unique value for each object, this is
+        #: the key of that value in the instance dictionary
+        self._key = _PER_INSTANCE_KEY_PREFIX + name
 
     #: m(__init__)
 
@@ -170,11 +175,20 @@ class PbsAttributeDescriptor():
         #  caused pbs_resource to be instantiated every time. Probably due to
         #  _get_default_value() getting evaluatd every time.
 
-        if obj not in self.__per_instance:
+        d = obj.__dict__
+        if self._key not in d:
             v = self._get_default_value()
-            self.__per_instance[obj] = v
-
-        return self.__per_instance[obj]
+            if v is None:
+                # nothing worth keeping per instance
+                return v
+            d[self._key] = v
+
+        v = d[self._key]
+        if v.__class__ is _LazyValue:
+            # first access to a value received undecoded, see _set_lazy()
+            v = self._decode(v.raw)
+            d[self._key] = v
+        return v
     #: m(__get__)
 
     def __set__(self, obj, value):
@@ -188,7 +202,21 @@ class PbsAttributeDescriptor():
         # to None, meaning to unset the attribute.
         if (value is None) and _pbs_v1.in_python_mode():
             set_value = ""
-        elif (value is None) or (value == "") \
+        elif not self._needs_decode(obj, value):
+            set_value = value
+        else:
+            set_value = self._value_type[0](value)
+        #:
+        obj.__dict__[self._key] = set_value
+    #: m(__set__)
+
+    def _needs_decode(self, obj, value):
+        """
+        Returns True if 'value' must be instantiated as the attribute's
+        value type before being stored on 'obj'.
+        """
+
+        if (value is None) or (value == "") \
             or isinstance(value, self._value_type) \
             or self._is_entity \
             or (hasattr(obj, "_is_entity")
@@ -201,16 +229,47 @@ class PbsAttributeDescriptor():
             #                       (isinstance(value, self._value_type)
             #     - a special entity resource type : self.is_entity is True
             #                             or parent object is an entity type
-            set_value = value
-        else:
-            if self._is_resource and isinstance(value, str) and (value[0] == "@"):
-                # an indirect resource
-                set_value = value
-            else:
-                set_value = self._value_type[0](value)
-        #:
-        self.__per_instance[obj] = set_value
-    #: m(__set__)
+            return False
+        if self._is_resource and isinstance(value, str) and (value[0] == "@"):
+            # an indirect resource
+            return False
+        return True
+    #: m(_needs_decode)
+
+    def _set_lazy(self, obj, value):
+        """
+        Stores 'value', as received from PBS, on 'obj' without instantiating
+        the attribute's value type, which is deferred to the first access
+        (most objects handed to a hook only have a few attributes read).
+        Like setting in C mode, this bypasses the settable checks.
+        """
+
+        if self._needs_decode(obj, value):
+            value = _LazyValue(value)
+        obj.__dict__[self._key] = value
+    #: m(_set_lazy)
+
+    def _is_set(self, obj):
+        """Returns True if 'obj' holds a value for this attribute."""
+
+        return self._key in obj.__dict__
+    #: m(_is_set)
+
+    def _decode(self, value):
+        """
+        Instantiates the attribute's value type out of 'value', in C mode
+        as was the case when the value was received.
+        """
+
+        in_python = _pbs_v1.in_python_mode()
+        if in_python:
+            _pbs_v1.set_c_mode()
+        try:
+            return self._value_type[0](value)
+        finally:
+            if in_python:
+                _pbs_v1.set_python_mode()
+    #: m(_decode)
 
     def _set_resc_atttr(self, resc_attr, is_entity=0):
         """
@@ -224,7 +283,7 @@ class PbsAttributeDescriptor():
     def __delete__(self, obj):
         """__delete__, we just set the attribute value to None"""
 
-        self.__per_instance[obj] = None
+        obj.__dict__[self._key] = None
     #: m(__delete__)
 
     def _get_default_value(self):
@@ -249,6 +308,19 @@ class PbsAttributeDescriptor():
 #: End Class PbsAttributeDescriptor
 
 
+class _LazyValue():
+    """
+    An attribute value received from PBS and not yet instantiated as the
+    attribute's value type, see PbsAttributeDescriptor._set_lazy().
+    """
+    __slots__ = ('raw',)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+#: End Class _LazyValue
+
+
 class PbsReadOnlyDescriptor():
     """This class wraps a generic read only data descriptor. This is a class
     level descriptor.
@@ -388,6 +460,21 @@ def size_to_kbytes(sz):
     return _pbs_v1.size_to_kbytes(sz)
 
 
+# _size_parts: given the string 'sz_str' of a _size value, returns the
+# tuple (<number>, <shift>) such that the value is <number> << <shift>
+# bytes, or None if the value is in words or cannot be parsed.
+_SIZE_SHIFTS = {'': 0, 'k': 10, 'm': 20, 'g': 30, 't': 40, 'p': 50}
+_SIZE_SUFFIXES = dict([(v, k) for (k, v) in _SIZE_SHIFTS.items()])
+_size_str_re = re.compile(r'^(\d+)([kmgtp]?)(b?)$', re.IGNORECASE)
+
+
+def _size_parts(sz_str):
+    m = _size_str_re.match(sz_str)
+    if m is None:
+        return None
+    return (int(m.group(1)), _SIZE_SHIFTS[m.group(2).lower()])
+
+
 class size(_size):
     """
     This represents a PBS size type.
@@ -422,7 +509,42 @@ class size(_size):
 
     _derived_types = (_size,)
 
+    def _parts(self):
+        """
+        Returns the (<number>, <shift>) making up the value, where the
+        value in bytes is <number> << <shift>, or None if expressed in
+        words. Computed once per instance.
+        """
+        try:
+            return self.__dict__['_size_parts']
+        except KeyError:
+            pass
+        parts = _size_parts(str(self))
+        self.__dict__['_size_parts'] = parts
+        return parts
+
+    def _cmp_bytes(self, other):
+        """
+        Returns the pair of byte counts of 'self' and 'other' to be
+        compared, or None if either is not a byte based size or an int.
+        """
+        sp = self._parts()
+        if sp is None:
+            return None
+        if isinstance(other, size):
+            op = other._parts()
+            if op is None:
+                return None
+            return (sp[0] << sp[1], op[0] << op[1])
+        if isinstance(other, int):
+            return (sp[0] << sp[1], other)
+        return None
+
     def __lt__(self, other):
+        b = self._cmp_bytes(other)
+        if b is not None:
+            return b[0] < b[1]
+
         so = transform_sizes(self, other)
         s = so[0]
         o = so[1]
@@ -437,6 +559,10 @@ class size(_size):
         return s.__lt__(o)
 
     def __le__(self, other):
+        b = self._cmp_bytes(other)
+        if b is not None:
+            return b[0] <= b[1]
+
         so = transform_sizes(self, other)
         s = so[0]
         o = so[1]
@@ -451,6 +577,10 @@ class size(_size):
         return s.__le__(o)
 
     def __gt__(self, other):
+        b = self._cmp_bytes(other)
+        if b is not None:
+            return b[0] > b[1]
+
         so = transform_sizes(self, other)
         s = so[0]
         o = so[1]
@@ -465,6 +595,10 @@ class size(_size):
         return s.__gt__(o)
 
     def __ge__(self, other):
+        b = self._cmp_bytes(other)
+        if b is not None:
+            return b[0] >= b[1]
+
         so = transform_sizes(self, other)
         s = so[0]
         o = so[1]
@@ -479,6 +613,10 @@ class size(_size):
         return s.__ge__(o)
 
     def __eq__(self, other):
+        b = self._cmp_bytes(other)
+        if b is not None:
+            return b[0] == b[1]
+
         so = transform_sizes(self, other)
         s = so[0]
         o = so[1]
@@ -504,6 +642,10 @@ class size(_size):
             # True  - yes, they're not equal.
             return True
 
+        b = self._cmp_bytes(other)
+        if b is not None:
+            return b[0] != b[1]
+
         so = transform_sizes(self, other)
         s = so[0]
         o = so[1]
@@ -517,7 +659,36 @@ class size(_size):
         # uses _size's richcompare
         return s.__ne__(o)
 
+    def _arith(self, other, sign):
+        """
+        Returns 'self' + 'sign' * 'other' as a size in the lower of the
+        two units, as _size's add/subtract would, or None if either is
+        not a byte based size or an int, or if the result is negative.
+        """
+        sp = self._parts()
+        if sp is None:
+            return None
+        if isinstance(other, size):
+            op = other._parts()
+            if op is None:
+                return None
+        elif isinstance(other, int) and other >= 0:
+            op = (other, 0)
+        else:
+            return None
+        shift = min(sp[1], op[1])
+        num = (sp[0] << (sp[1] - shift)) + sign * (op[0] << (op[1] - shift))
+        if num < 0:
+            return None
+        ret = size("%d%sb" % (num, _SIZE_SUFFIXES[shift]))
+        ret.__dict__['_size_parts'] = (num, shift)
+        return ret
+
     def __add__(self, other):
+        ret = self._arith(other, 1)
+        if ret is not None:
+            return ret
+
         s = self
         o = other
         if isinstance(self, (int, size)):
@@ -531,6 +702,10 @@ class size(_size):
         return size(s.__add__(o))
 
     def __sub__(self, other):
+        ret = self._arith(other, -1)
+        if ret is not None:
+            return ret
+
         s = self
         o = other
         if isinstance(self, (int, size)):
@@ -922,6 +1097,28 @@ class acl(_generic_attr):
         super().__init__(value)
 
 
+# _spec_tokens: splits a chunk specification 'spec' like the values of
+# select ("2:ncpus=1+mem=1gb"), exec_vnode ("(vn1:ncpus=1)+(vn2:mem=1gb)")
+# and place ("scatter:excl") into a tuple of chunks, each a tuple of the
+# ':'-separated fields of the chunk, without the enclosing parentheses.
+# Results are cached by 'spec', as the same values get parsed repeatedly
+# within a hook.
+_SPEC_TOKENS_MAX = 256
+_spec_tokens_cache = {}
+
+
+def _spec_tokens(spec):
+    spec = str(spec)
+    toks = _spec_tokens_cache.get(spec)
+    if toks is None:
+        toks = tuple([tuple(c.strip("(").strip(")").split(":"))
+                      for c in spec.split("+")])
+        if len(_spec_tokens_cache) >= _SPEC_TOKENS_MAX:
+            _spec_tokens_cache.clear()
+        _spec_tokens_cache[spec] = toks
+    return toks
+
+
 class select(_generic_attr):
     """
     This represents the select resource specification when submitting a job.
@@ -1032,11 +1229,11 @@ class select(_generic_attr):
 
         ret_str = ""
         i = 0  # index to each chunk in the + separated spec
-        for chunk in str(self).split("+"):
+        for chunk in _spec_tokens(self):
             if i != 0:
                 ret_str += '+'
             j = 0  # index to items within a chunk separated by ':'
-            for subchunk in chunk.split(":"):
+            for subchunk in chunk:
                 c_str = subchunk
                 if j == 0:
                     # given <chunk_ct>:<res1>=<val1>:<res2>=<val2> or
@@ -1534,6 +1731,10 @@ class pbs_resource():
     attributes = __resources
     _attributes_hook_set = {}
     _attributes_unknown = {}
+    # maps lowercased resource names to the names in 'attributes', see
+    # _resc_canonical_name()
+    _attributes_lower = {}
+    _attributes_lower_count = 0
 
     def __init__(self, name, is_entity=0):
         """__init__"""
@@ -1594,7 +1795,7 @@ class pbs_resource():
             # load the cached resource value
             _pbs_v1.load_resource_value(self)
 
-        return getattr(self, resname)
+        return getattr(self, _resc_canonical_name(resname) or resname)
     #: m(__getitem__)
 
     def __setitem__(self, resname, resval):
@@ -1609,7 +1810,7 @@ class pbs_resource():
     def __contains__(self, resname):
         """__contains__"""
 
-        return hasattr(self, resname)
+        return hasattr(self, _resc_canonical_name(resname) or resname)
     #: m(__contains__)
 
     def __setattr__(self, nameo, value):
@@ -1630,18 +1831,12 @@ class pbs_resource():
 
             # resource names in PBS are case insensitive,
             # so do caseless matching here.
-            found = False
-            namel = nameo.lower()
-            for resc in pbs_resource.attributes:
-                rescl = resc.lower()
-                if namel == rescl:
-                    # Need to use the matched name stored in PBS Python resource
-                    # table, to avoid resource ambiguity later on.
-                    name = resc
-                    found = True
-
-            if not found:
-
+            # Need to use the matched name stored in PBS Python resource
+            # table, to avoid resource ambiguity later on.
+            resc = _resc_canonical_name(nameo)
+            if resc is not None:
+                name = resc
+            else:
                 if _pbs_v1.in_python_mode():
                     # if attribute name not found,and executing inside Python
                     # script
@@ -1699,6 +1894,23 @@ pbs_resource._name = PbsAttributeDescriptor(pbs_resource, '_name',
                                             "<generic resource>", (str,))
 
 
+def _resc_canonical_name(name):
+    """
+    Returns the name in the pbs_resource table matching 'name' without
+    regard to case, or None if there is no such resource.
+    The lowercase index is only rebuilt when resources have been added
+    to the table since the last lookup.
+    """
+    attrs = pbs_resource.attributes
+    if pbs_resource._attributes_lower_count != len(attrs):
+        index = {}
+        for resc in attrs:
+            index[resc.lower()] = resc
+        pbs_resource._attributes_lower = index
+        pbs_resource._attributes_lower_count = len(attrs)
+    return pbs_resource._attributes_lower.get(name.lower())
+
+
 class vchunk():
     """
     This represents a resource chunk assigned to a job.
@@ -1709,17 +1921,49 @@ class vchunk():
     def __init__(self, achunk):
         """__init__"""
 
-        ch = achunk.split(":")
-        self.chunk_resources = pbs_resource("Resource_List")
-        for c in ch:
+        if isinstance(achunk, tuple):
+            # already split by _spec_tokens()
+            self._fields = achunk
+        else:
+            self._fields = _spec_tokens(achunk)[0]
+        self._chunk_resources = None
+        self.vnode_name = None
+        for c in self._fields:
             if c.find("=") == -1:
                 self.vnode_name = c
-            else:
-                rs = c.split("=", 1)
-                descr = getattr(pbs_resource, rs[0])
-                self.chunk_resources[rs[0]] = descr._value_type[0](rs[1])
     #: m(__init__)
 
+    def _get_chunk_resources(self):
+        """
+        Returns the resources of the chunk, instantiated on first access.
+        """
+        if self._chunk_resources is None:
+            # built in C mode, as when the chunk was parsed along with
+            # its exec_vnode value
+            in_python = _pbs_v1.in_python_mode()
+            if in_python:
+                _pbs_v1.set_c_mode()
+            try:
+                rl = pbs_resource("Resource_List")
+                for c in self._fields:
+                    if c.find("=") != -1:
+                        rs = c.split("=", 1)
+                        resc = _resc_canonical_name(rs[0]) or rs[0]
+                        descr = getattr(pbs_resource, resc)
+                        rl[resc] = descr._value_type[0](rs[1])
+            finally:
+                if in_python:
+                    _pbs_v1.set_python_mode()
+            self._chunk_resources = rl
+        return self._chunk_resources
+    #: m(_get_chunk_resources)
+
+    def _set_chunk_resources(self, value):
+        self._chunk_resources = value
+    #: m(_set_chunk_resources)
+
+    chunk_resources = property(_get_chunk_resources, _set_chunk_resources)
+
 
 class exec_vnode(_generic_attr):
     """
@@ -1737,15 +1981,25 @@ class exec_vnode(_generic_attr):
             ev.chunks[1].vnode_name = 'vnodeC'
             ev.chunks[1].vnode_resources = {  'mem' : pbs.size('Z') }
 
+            The chunks are only parsed the first time ev.chunks is accessed.
     """
     _derived_types = (_generic_attr,)
 
     def __init__(self, value):
         _pbs_v1.validate_input("job", "exec_vnode", value)
         super().__init__(value)
-        self.chunks = list()
-        vals = value.split("+")
-        i = 0
-        for v in vals:
-            self.chunks.append(vchunk(v.strip("(").strip(")")))
+        self._chunks = None
+
+    def _get_chunks(self):
+        """Returns the list of vchunk, built on first access."""
+        if self._chunks is None:
+            self._chunks = [vchunk(c) for c in _spec_tokens(self._value)]
+        return self._chunks
+    #: m(_get_chunks)
+
+    def _set_chunks(self, value):
+        self._chunks = value
+    #: m(_set_chunks)
+
+    chunks = property(_get_chunks, _set_chunks)
 #: --------         EXPORTED TYPES DICTIONARY                      ---------
@@ -0,0 +1,213 @@
+"""
+
+# Copyright (C) 1994-2021 Altair Engineering, Inc.
+# For more information, contact Altair at www.altair.com.
+#
+# This file is part of both the OpenPBS software ("OpenPBS")
+# and the PBS Professional ("PBS Pro") software.
+#
+# Open Source License Information:
+#
+# OpenPBS is free software. You can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at your
+# option) any later version.
+#
+# OpenPBS is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Affero General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Commercial License Information:
+#
+# PBS Pro is commercially licensed software that shares a common core with
+# the OpenPBS software.  For a copy of the commercial license terms and
+# conditions, go to: (http://www.pbspro.com/agreement.html) or contact the
+# Altair Legal Department.
+#
+# Altair's dual-license business model allows companies, individuals, and
+# organizations to create proprietary derivative works of OpenPBS and
+# distribute them - whether embedded or bundled with other software -
+# under a commercial license agreement.
+#
+# Use of Altair's trademarks, including but not limited to "PBS™",
+# "OpenPBS®", "PBS Professional®", and "PBS Pro™" and Altair's logos is
+# subject to Altair's trademark licensing policies.
+
+
+"""
+__doc__ = """
+Binary form of the hook debug data file, which records the pbs.server()
+data obtained by a hook so that it can be replayed with pbs_python.
+
+The file starts with HOOK_DATA_MAGIC, followed by one record per object:
+
+    <record length><object type><object name>[<name><resource><value>]...
+
+where the record length and each field are prefixed with their length,
+as a 4 byte unsigned integer in network byte order, and each field is
+UTF-8 encoded (an empty <resource> for a plain attribute).
+
+hook_data_reader maps such a file in memory and only indexes its records
+when opened; the attributes of an object are decoded when the object is
+looked up.
+"""
+
+import mmap
+import struct
+
+# must match HOOK_DATA_BINARY_MAGIC in pbs_python.h
+HOOK_DATA_MAGIC = b"PBSHOOKDATA\x01\n"
+
+_LEN = struct.Struct("!I")
+
+
+def _pack_fields(fields):
+    parts = []
+    for f in fields:
+        if f is None:
+            f = ""
+        b = str(f).encode("utf-8")
+        parts.append(_LEN.pack(len(b)))
+        parts.append(b)
+    return b"".join(parts)
+
+
+class hook_data_writer():
+    """
+    Appends object records to the binary hook data file 'path'. Records
+    are buffered, and written out at once by close().
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._records = []
+    #: m(__init__)
+
+    def write_object(self, objtype, name, entries):
+        """
+        Records the object of type 'objtype' ("job", "queue", "vnode",
+        "resv", or "server") named 'name', with 'entries' a list of
+        (<attribute name>, <resource name or None>, <value>).
+        """
+        fields = [objtype, name]
+        for e in entries:
+            fields.extend(e)
+        rec = _pack_fields(fields)
+        self._records.append(_LEN.pack(len(rec)) + rec)
+    #: m(write_object)
+
+    def close(self):
+        """Writes out the buffered records."""
+        if not self._records:
+            return
+        with open(self._path, "ab") as f:
+            if f.tell() == 0:
+                f.write(HOOK_DATA_MAGIC)
+            f.write(b"".join(self._records))
+        self._records = []
+    #: m(close)
+
+#: C(hook_data_writer)
+
+
+class _attrl():
+    """An attribute of a _batch_status, as in pbs_ifl's attrl."""
+    __slots__ = ('name', 'resource', 'value', 'next')
+
+    def __init__(self, name, resource, value):
+        self.name = name
+        self.resource = resource
+        self.value = value
+        self.next = None
+
+
+class _batch_status():
+    """An object read from the file, as in pbs_ifl's batch_status."""
+    __slots__ = ('name', 'attribs', 'next')
+
+    def __init__(self, name, attribs):
+        self.name = name
+        self.attribs = attribs
+        self.next = None
+
+
+class hook_data_reader():
+    """
+    Gives access to the objects recorded in the binary hook data file
+    'path'. Raises ValueError if 'path' is not such a file.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(HOOK_DATA_MAGIC)) != HOOK_DATA_MAGIC:
+                raise ValueError("%s: not a binary hook data file" % path)
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # (<object type>, <object name>) -> [<offset of first attribute>,
+        #                                    <end of record>, ...]
+        self._index = {}
+        # <object type> -> [<object name>, ...], in file order
+        self._names = {}
+
+        m = self._map
+        pos = len(HOOK_DATA_MAGIC)
+        end = len(m)
+        while pos + _LEN.size <= end:
+            (reclen,) = _LEN.unpack_from(m, pos)
+            pos += _LEN.size
+            rec_end = pos + reclen
+            if rec_end > end:
+                # truncated record, as from an interrupted hook
+                break
+            (objtype, p) = self._field(pos)
+            (name, p) = self._field(p)
+            key = (objtype, name)
+            if key not in self._index:
+                self._index[key] = []
+                self._names.setdefault(objtype, []).append(name)
+            self._index[key].extend((p, rec_end))
+            pos = rec_end
+    #: m(__init__)
+
+    def _field(self, pos):
+        """Returns the field at 'pos' and the position following it."""
+        (flen,) = _LEN.unpack_from(self._map, pos)
+        pos += _LEN.size
+        return (self._map[pos:pos + flen].decode("utf-8"), pos + flen)
+    #: m(_field)
+
+    def names(self, objtype):
+        """Returns the names of the objects of type 'objtype'."""
+        return list(self._names.get(objtype, []))
+    #: m(names)
+
+    def status(self, objtype, name):
+        """
+        Returns the object of type 'objtype' named 'name' as a
+        batch_status like entry, or None if not recorded.
+        """
+        spans = self._index.get((objtype, name))
+        if spans is None:
+            return None
+        head = None
+        tail = None
+        for i in range(0, len(spans), 2):
+            (pos, rec_end) = (spans[i], spans[i + 1])
+            while pos < rec_end:
+                (n, pos) = self._field(pos)
+                (r, pos) = self._field(pos)
+                (v, pos) = self._field(pos)
+                a = _attrl(n, r or None, v)
+                if tail is None:
+                    head = a
+                else:
+                    tail.next = a
+                tail = a
+        return _batch_status(name, head)
+    #: m(status)
+
+#: C(hook_data_reader)
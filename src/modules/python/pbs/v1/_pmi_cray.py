@@ -49,17 +49,73 @@ import os
 import stat
 import time
 import random
-from subprocess import Popen, PIPE
+from subprocess import Popen, PIPE, DEVNULL
 from pbs.v1._pmi_types import BackendError
 import pbs
 from pbs.v1._pmi_utils import _running_excl, _pbs_conf, _get_vnode_names, \
-    _svr_vnode
+    _svr_vnodes
+
+# Seconds after which a background capmc still running is given up on
+sampler_timeout = 300
+
+# Run by start_sampler() as: <out> <lock> <time> <timeout> <capmc argv...>.
+# Saves the capmc reply to <out> through a private temporary file, then
+# removes <lock>.
+sampler_script = """
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+out, lock, now, timeout = sys.argv[1:5]
+tmp = None
+try:
+    run = subprocess.run(sys.argv[5:], stdin=subprocess.DEVNULL,
+                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                         timeout=int(timeout))
+    if run.returncode == 0:
+        reply = json.loads(run.stdout)
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(out) + ".",
+                                   dir=os.path.dirname(out))
+        with os.fdopen(fd, "w") as f:
+            json.dump({"time": int(now), "reply": reply}, f)
+        os.rename(tmp, out)
+        tmp = None
+except Exception:
+    pass
+finally:
+    for name in (tmp, lock):
+        try:
+            if name is not None:
+                os.unlink(name)
+        except OSError:
+            pass
+"""
 
 pbsexec = _pbs_conf("PBS_EXEC")
 if pbsexec is None:
     raise BackendError("PBS_EXEC not found")
 
 
+def capmc_cmd():
+    """
+    Return the capmc command to run.
+
+    :returns: the value of PBS_PMI_CAPMC if set (e.g. to run a stand-in
+              for capmc), else the full path to capmc given by Cray if
+              it exists, else capmc.
+    """
+    cmd = _pbs_conf("PBS_PMI_CAPMC")
+    if cmd:
+        return cmd
+    cmd = os.path.join(os.path.sep, 'opt', 'cray',
+                       'capmc', 'default', 'bin', 'capmc')
+    if not os.path.exists(cmd):
+        cmd = "capmc"		# should be in PATH then
+    return cmd
+
+
 def launch(jid, args):
     """
     Run capmc and return the structured output.
@@ -72,12 +128,7 @@ def launch(jid, args):
     """
     import json
 
-    # full path to capmc given by Cray
-    cmd = os.path.join(os.path.sep, 'opt', 'cray',
-                       'capmc', 'default', 'bin', 'capmc')
-    if not os.path.exists(cmd):
-        cmd = "capmc"		# should be in PATH then
-    cmd = cmd + " " + args
+    cmd = capmc_cmd() + " " + args
     fail = ""
 
     pbs.logjobmsg(jid, "launch: " + cmd)
@@ -121,8 +172,10 @@ def jobnids(job):
     """
     nidset = set()
     craynid = "PBScraynid"
-    for vname in _get_vnode_names(job):
-        vnode = _svr_vnode(vname)
+    vnames = _get_vnode_names(job)
+    vnodes = _svr_vnodes(vnames)
+    for vname in vnames:
+        vnode = vnodes[vname]
         try:
             nidset.add(int(vnode.resources_available[craynid]))
         except Exception:
@@ -140,8 +193,9 @@ def nodenids(hosts):
     """
     nidset = set()
     craynid = "PBScraynid"
+    vnodes = _svr_vnodes(hosts)
     for vnames in hosts:
-        vnode = _svr_vnode(vnames)
+        vnode = vnodes[vnames]
         try:
             nidset.add(int(vnode.resources_available[craynid]))
         except Exception:
@@ -286,9 +340,118 @@ def job_energy(job, nids, cnt):
     return energy
 
 
+def mom_priv_file(name):
+    """
+    Form a path to the MoM private directory with name as the last
+    element. Unlike the spool directory, only root may write there.
+
+    :param name: file name
+    :type name: str
+    :returns: path in format PBS_MOM_HOME/mom_priv/<name>, PBS_HOME
+              standing for PBS_MOM_HOME if unset.
+    """
+    home = _pbs_conf("PBS_MOM_HOME")
+    if home is None:
+        home = _pbs_conf("PBS_HOME")
+    if home is None:
+        raise BackendError("PBS_HOME not found")
+    return os.path.join(home, "mom_priv", name)
+
+
+def sample_file():
+    """
+    Form the path to the file holding the latest energy counters
+    sampled by start_sampler().
+
+    :returns: path in format PBS_HOME/mom_priv/capmc_energy.json.
+    """
+    return mom_priv_file("capmc_energy.json")
+
+
+def start_sampler(nids, cnt):
+    """
+    Start capmc get_node_energy_counter in the background, unless the
+    previous one is still running. Its reply is saved in sample_file()
+    as {"time": <start time>, "reply": <capmc output>} for a later
+    event to read, so the caller does not wait for capmc.
+
+    :param nids: nid list
+    :type nids: str
+    :param cnt: node count
+    :type cnt: int
+    """
+    if cnt == 0:
+        return
+    out = sample_file()
+    lock = out + ".run"
+    now = int(time.time())
+    try:
+        fd = os.open(lock, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except OSError:
+        try:
+            if now - os.stat(lock).st_mtime < sampler_timeout:
+                return
+            os.unlink(lock)
+            fd = os.open(lock, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except OSError:
+            return
+    os.close(fd)
+    cmd = [os.path.join(pbsexec, "bin", "pbs_python"), "-c", sampler_script,
+           out, lock, str(now), str(sampler_timeout), capmc_cmd(),
+           "get_node_energy_counter", "--nids", nids]
+    pbs.logmsg(pbs.EVENT_DEBUG3, "Cray: sampling energy of %d nodes" % cnt)
+    try:
+        Popen(cmd, stdin=DEVNULL, stdout=DEVNULL, stderr=DEVNULL,
+              close_fds=True, start_new_session=True)
+    except (OSError, ValueError) as e:
+        pbs.logmsg(pbs.EVENT_DEBUG, "Cray: energy sampler failed: %s" %
+                   str(e))
+        os.unlink(lock)
+
+
+def read_sample():
+    """
+    Return the latest energy counters saved by start_sampler().
+
+    :returns: (start time of the capmc run, capmc output), or
+              (None, None) if there is no valid sample.
+    """
+    import json
+
+    try:
+        with open(sample_file(), "r") as f:
+            sample = json.load(f)
+        reply = sample["reply"]
+        if reply["e"] != 0 or "nodes" not in reply:
+            return None, None
+        return int(sample["time"]), reply
+    except Exception:
+        return None, None
+
+
+def jobs_energy(nidjobs, reply):
+    """
+    Attribute the energy counters of the nodes in a capmc reply to the
+    jobs running on them, in a single pass over the reply.
+
+    :param nidjobs: job ids keyed by the nids they run on
+    :type nidjobs: dict
+    :param reply: output of capmc get_node_energy_counter
+    :type reply: dict
+    :returns: (energy counter total, number of nids seen) keyed by job id
+    """
+    energy = dict()
+    for node in reply["nodes"]:
+        for jobid in nidjobs.get(node["nid"], ()):
+            total, seen = energy.get(jobid, (0, 0))
+            energy[jobid] = (total + node["energy_ctr"], seen + 1)
+    return energy
+
+
 class Pmi:
 
-    ninfo = None
+    energy = None
+    sampled = None
     nidarray = dict()
 
     def __init__(self, pyhome=None):
@@ -313,6 +476,7 @@ class Pmi:
         try:
             f = open(energy_file(job), "r")
             start = int(f.read())
+            started = os.fstat(f.fileno()).st_mtime
             f.close()
         except Exception:
             return None
@@ -320,28 +484,34 @@ class Pmi:
         e = pbs.event()
         if e.type == pbs.EXECHOST_PERIODIC:
             # This function will be called for each job in turn when
-            # running from a periodic hook.  Here we fill in some
-            # global variables just once and use the information
-            # for each job in turn.  Save the result of calling capmc
-            # for all running jobs in the variable ninfo.  Keep a
-            # dictionary with the job id's as keys holding a set
-            # of nid numbers.
-            if Pmi.ninfo is None:
+            # running from a periodic hook.  The first call indexes the
+            # nids of all the running jobs, starts a capmc sampling
+            # them in the background for the next period, and
+            # attributes the energy counters of the latest sample to
+            # the jobs.  The energy of a job is only reported if the
+            # sample covers all of its nids and was taken after its
+            # starting energy was recorded.
+            if Pmi.energy is None:
                 allnids = set()
+                nidjobs = dict()
                 for jobid in list(e.job_list.keys()):
-                    j = e.job_list[jobid]
-                    nidset = jobnids(j)
+                    nidset = jobnids(e.job_list[jobid])
                     allnids.update(nidset)
                     Pmi.nidarray[jobid] = nidset
+                    for nid in nidset:
+                        nidjobs.setdefault(nid, []).append(jobid)
+                Pmi.sampled, reply = read_sample()
+                if reply is not None:
+                    Pmi.energy = jobs_energy(nidjobs, reply)
+                else:
+                    Pmi.energy = dict()
                 nids, cnt = nidlist(None, allnids)
-                Pmi.ninfo = node_energy("all", nids, cnt)
-            nidset = Pmi.nidarray[job.id]
+                start_sampler(nids, cnt)
             energy = None
-            if Pmi.ninfo is not None and "nodes" in Pmi.ninfo:
-                energy = 0
-                for node in Pmi.ninfo["nodes"]:
-                    if node["nid"] in nidset:		# owned by job of interest
-                        energy += node["energy_ctr"]
+            total, seen = Pmi.energy.get(job.id, (0, 0))
+            if (seen == len(Pmi.nidarray[job.id]) and seen > 0 and
+                    Pmi.sampled >= started):
+                energy = total
                 pbs.logjobmsg(job.id, "Cray: get_usage: energy %dJ" %
                               energy)
         else:
@@ -563,8 +733,9 @@ class Pmi:
         else:
             return nodeset
         craynid = "PBScraynid"
+        vnodes = _svr_vnodes(hosts)
         for vnames in hosts:
-            vnode = _svr_vnode(vnames)
+            vnode = vnodes[vnames]
             if craynid in vnode.resources_available:
                 nid = int(vnode.resources_available[craynid])
                 if nid in ready:
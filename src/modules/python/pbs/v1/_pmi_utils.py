@@ -47,6 +47,7 @@ Utility power functions.
 import pbs
 import os
 import sys
+import time
 
 
 def _pbs_conf(confvar):
@@ -142,22 +143,77 @@ def _get_vnode_names(job):
     return vnodes
 
 
+# Vnode attributes read by the power functions.
+pmi_vnode_attribs = ["power_provisioning", "jobs", "resources_available"]
+
+# Up to this many vnodes are queried from the server one by one,
+# above that all the vnodes are queried at once.
+pmi_vnode_query_max = 16
+
+# Vnodes obtained from the server, as (time obtained, vnode object)
+# keyed by name, shared by the events run in this interpreter.
+pmi_pbsvnodes = dict()
+
+
+def _vnode_cache_ttl():
+    # Return the number of seconds a vnode obtained from the server is
+    # reused, from PBS_PMI_VNODE_CACHE_TTL, or None to reuse it for as
+    # long as this interpreter runs.
+    val = _pbs_conf("PBS_PMI_VNODE_CACHE_TTL")
+    if val is None:
+        return None
+    try:
+        return max(int(val), 0)
+    except ValueError:
+        pbs.logmsg(pbs.EVENT_DEBUG,
+                   "Bad PBS_PMI_VNODE_CACHE_TTL value %s" % val)
+        return None
+
+
+def _svr_vnodes(names):
+    """
+    Return a dictionary of the vnode objects obtained from the server
+    for the vnodes in names, with only the attributes the power
+    functions read. Vnodes already obtained are reused unless older
+    than PBS_PMI_VNODE_CACHE_TTL seconds; the others are queried
+    together. Vnodes unknown to the server are left out.
+    """
+    now = time.time()
+    ttl = _vnode_cache_ttl()
+    missing = []
+    for name in set(names):
+        if name in pmi_pbsvnodes:
+            if ttl is None or now - pmi_pbsvnodes[name][0] < ttl:
+                continue
+        missing.append(name)
+    if len(missing) > pmi_vnode_query_max:
+        found = pbs.server().vnodes_dict(missing, pmi_vnode_attribs)
+    else:
+        found = dict()
+        for name in missing:
+            vn = pbs.server().vnode(name, pmi_vnode_attribs)
+            if vn is not None:
+                found[name] = vn
+    for name in missing:
+        if name in found:
+            pmi_pbsvnodes[name] = (now, found[name])
+        else:
+            pmi_pbsvnodes.pop(name, None)
+    return dict((name, pmi_pbsvnodes[name][1]) for name in names
+                if name in pmi_pbsvnodes)
+
+
 def _svr_vnode(name):
     # Return a vnode object obtained from the server by name.
-    # Save the values in a global dictionary for future use.
-    global pmi_pbsconf
-    if "pmi_pbsvnodes" not in globals():
-        global pmi_pbsvnodes
-        pmi_pbsvnodes = dict()
-        for vn in pbs.server().vnodes():
-            pmi_pbsvnodes[vn.name] = vn
-    return pmi_pbsvnodes[name]
+    return _svr_vnodes([name])[name]
 
 
 def _running_excl(job):
     # Look for any other job that is running on a job's vnodes
-    for vname in _get_vnode_names(job):
-        vnode = _svr_vnode(vname)
+    vnames = _get_vnode_names(job)
+    vnodes = _svr_vnodes(vnames)
+    for vname in vnames:
+        vnode = vnodes[vname]
         for j in str(vnode.jobs).split(', '):
             id = j.partition('/')[0]
             if job.id != id:
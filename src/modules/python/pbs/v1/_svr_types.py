@@ -47,7 +47,7 @@ This module captures all the python types representing the PBS Server objects
 (server,queue,job,resv, etc.)
 """
 from ._base_types import (PbsAttributeDescriptor, PbsReadOnlyDescriptor,
-                          pbs_resource, pbs_bool, _LOG,
+                          pbs_resource, pbs_bool, _LOG, _resc_canonical_name,
                           )
 import _pbs_v1
 from _pbs_v1 import (_event_accept, _event_reject,
@@ -55,6 +55,7 @@ from _pbs_v1 import (_event_accept, _event_reject,
                      iter_nextfunc)
 
 from ._exc_types import *
+from ._hook_data import hook_data_reader, hook_data_writer
 
 NAS_mod = 0
 
@@ -75,17 +76,29 @@ try:
 except:
     pass
 
+# Set global hook_data_binary parameter: hook debug data files are written
+# in the binary format of _hook_data instead of as text.
+hook_data_binary = False
+try:
+    if os.environ.get("PBS_HOOK_DATA_FORMAT") == "binary":
+        hook_data_binary = True
+except:
+    pass
+
 # Set global pbs_conf parameter.
 pbs_conf = _pbs_v1.get_pbs_conf()
 
 
 #
 # get_server_data_fp: returns the file object representing the
-#                     hook debug data file.
+#                     hook debug data file, or a hook_data_writer if
+#                     writing it in binary format.
 def get_server_data_fp():
     data_file = _pbs_v1.get_server_data_file()
     if data_file is None:
         return None
+    if hook_data_binary:
+        return hook_data_writer(data_file)
     try:
         return open(data_file, "a+");
     except:
@@ -103,6 +116,336 @@ def get_local_nodename():
     return(_pbs_v1.get_local_host_name())
 
 
+#
+# _pbs_conn_pool: connections to PBS servers kept open for the lifetime of
+#                 the hook invocation, keyed by server name ("" being the
+#                 local server). pbs_python runs a single hook per process,
+#                 so the pool is released when the interpreter exits.
+_pbs_conn_pool = {}
+
+
+def _pbs_pooled_connect(connect_server=None):
+    """
+    Returns a tuple (<connection handle>, <reused>) to 'connect_server'
+    (or "localhost" if None), reusing the pooled connection if one was
+    already opened during this hook invocation. <reused> is True if the
+    handle came from the pool. The handle is < 0 on failure.
+    """
+    key = connect_server or ""
+    con = _pbs_conn_pool.get(key, -1)
+    if con >= 0:
+        return (con, True)
+
+    if connect_server is None:
+        con = pbs_connect("localhost")
+    else:
+        con = pbs_connect(connect_server)
+    if con >= 0:
+        _pbs_conn_pool[key] = con
+    return (con, False)
+
+
+def _pbs_pooled_drop(connect_server=None):
+    """
+    Disconnects and forgets the pooled connection to 'connect_server'.
+    """
+    con = _pbs_conn_pool.pop(connect_server or "", -1)
+    if con >= 0:
+        pbs_disconnect(con)
+
+
+def pbs_release_connections():
+    """
+    Disconnects all the connections pooled by pbs_statobj(). This is
+    registered to run at interpreter exit, but may be called earlier by a
+    hook that is done talking to the server(s).
+    """
+    for key in list(_pbs_conn_pool.keys()):
+        _pbs_pooled_drop(key or None)
+
+
+try:
+    import atexit
+    atexit.register(pbs_release_connections)
+except:
+    pass
+
+
+#
+# _pbs_attrl: converts a list of attribute names of the form "<attr>" or
+#             "<attr>.<resource>" into an attrl linked list suitable for the
+#             pbs_stat*() calls. Returns None (meaning "all attributes") if
+#             'attribs' is None or empty.
+def _pbs_attrl(attribs):
+    head = None
+    prev = None
+    if not attribs:
+        return None
+    for n in attribs:
+        a = attrl()
+        if "." in n:
+            (a.name, a.resource) = n.split(".", 1)
+        else:
+            a.name = n
+        a.value = ""
+        a.next = None
+        if prev is None:
+            head = a
+        else:
+            prev.next = a
+        prev = a
+    return head
+
+
+#
+# _pbs_stat_failed: True if the last _pbs_stat() call got no reply from the
+#                   server, as opposed to a reply holding no (such) objects.
+_pbs_stat_failed = False
+
+
+#
+# _pbs_stat: issues the pbs_stat*() call matching 'objtype' over the pooled
+#            connection. If the call fails on a connection error, the pooled
+#            connection is dropped and, if it was a reused one that may have
+#            gone stale, the call is retried once over a new connection.
+#            Returns the batch_status list, or None.
+def _pbs_stat(objtype, name, connect_server, attribs=None):
+    global _pbs_stat_failed
+
+    _pbs_stat_failed = True
+    a = _pbs_attrl(attribs)
+    for _ in range(2):
+        (con, reused) = _pbs_pooled_connect(connect_server)
+        if con < 0:
+            _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
+                           "pbs_statobj: Unable to connect to server %s"
+                           % (connect_server))
+            return None
+
+        if(objtype == "job"):
+            bs = pbs_statjob(con, name, a, None)
+        elif(objtype == "queue"):
+            bs = pbs_statque(con, name, a, None)
+        elif(objtype == "vnode"):
+            bs = pbs_statvnode(con, name, a, None)
+        elif(objtype == "resv"):
+            bs = pbs_statresv(con, name, a, None)
+        elif(objtype == "server"):
+            bs = pbs_statserver(con, a, None)
+        else:
+            _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
+                           "pbs_statobj: Bad object type %s" % (objtype))
+            return None
+
+        if bs:
+            _pbs_stat_failed = False
+            return bs
+        err = pbs_get_errno()
+        if err not in (PBSE_PROTOCOL, PBSE_NOCONNECTS, PBSE_NOSERVER):
+            # the server replied, there is just no such object
+            _pbs_stat_failed = False
+            return None
+        _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
+                       "pbs_statobj: Unable to query server %s: error %d"
+                       % (connect_server, err))
+        _pbs_pooled_drop(connect_server)
+        if not reused:
+            return None
+    return None
+
+
+#
+# _server_data_write: records in 'server_data_fp' the 'entries' obtained by
+#                     _pbs_batch_to_obj() for the object of type 'objtype'
+#                     named 'name', either as the text lines
+#                     "<header_str>.<name>[<resource>]=<value>" in a single
+#                     write, or as a record of a hook_data_writer.
+def _server_data_write(server_data_fp, objtype, name, header_str, entries):
+    if isinstance(server_data_fp, hook_data_writer):
+        server_data_fp.write_object(objtype, name,
+                                    [(n, r, raw) for (n, r, v, raw) in entries])
+        return
+    lines = []
+    for (n, r, v, raw) in entries:
+        if r:
+            lines.append("%s.%s[%s]=%s\n" % (header_str, n, r, v))
+        else:
+            lines.append("%s.%s=%s\n" % (header_str, n, v))
+    server_data_fp.write("".join(lines))
+
+
+#
+# _pbs_batch_to_obj: instantiates the _job, _queue, _vnode, _resv, or _server
+#                    object (per 'objtype') described by the batch_status
+#                    entry 'b', populating it with the entry's attributes and
+#                    recording them in 'server_data_fp' if set.
+#                    Returns None if 'objtype' is bad, or if 'filter_queue'
+#                    is given and the job is not in that queue.
+def _pbs_batch_to_obj(objtype, b, connect_server, header_str, server_data_fp,
+                      filter_queue=None):
+    if(objtype == "job"):
+        obj = _job(b.name, connect_server)
+    elif(objtype == "queue"):
+        obj = _queue(b.name, connect_server)
+    elif(objtype == "vnode"):
+        obj = _vnode(b.name, connect_server)
+    elif(objtype == "resv"):
+        obj = _resv(b.name, connect_server)
+    elif(objtype == "server"):
+        obj = _server(b.name, connect_server)
+    else:
+        _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
+                       "pbs_statobj: Bad object type %s" % (objtype))
+        return None
+
+    # (<name>, <resource>, <value as recorded in text>, <value as received>)
+    entries = []
+    a = b.attribs
+
+    while(a):
+        n = a.name
+        r = a.resource
+        v = a.value
+        raw = v
+
+        if(objtype == "vnode"):
+            if(n == ATTR_NODE_state):
+                v = _pbs_v1.str_to_vnode_state(v)
+            elif(n == ATTR_NODE_ntype):
+                v = _pbs_v1.str_to_vnode_ntype(v)
+            elif(n == ATTR_NODE_Sharing):
+                v = _pbs_v1.str_to_vnode_sharing(v)
+
+        elif(objtype == "job"):
+            if((filter_queue != None) and (n == ATTR_queue) and
+                    (filter_queue != v)):
+                return None
+            if n == ATTR_inter or n == ATTR_block or n == ATTR_X11_port:
+                v = int(pbs_bool(v))
+
+        if(r):
+            pr = getattr(obj, n)
+
+            # instantiate Resource_List object if not set
+            if(pr == None):
+                setattr(obj, n)
+
+            pr = getattr(obj, n)
+            if (pr == None):
+                _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
+                               "pbs_statobj: missing %s" % (n))
+                a = a.next
+                continue
+
+            # a first value is kept undecoded until read, see
+            # PbsAttributeDescriptor._set_lazy()
+            desc = getattr(pbs_resource, _resc_canonical_name(r) or r, None)
+            if isinstance(desc, PbsAttributeDescriptor) and \
+                    not desc._is_set(pr):
+                desc._set_lazy(pr, v)
+                entries.append((n, r, v, raw))
+                a = a.next
+                continue
+
+            vo = getattr(pr, r)
+            if(vo == None):
+                setattr(pr, r, v)
+                entries.append((n, r, v, raw))
+            else:
+                # append value...
+                # example: "select=1:ncpus=1,ncpus=1,nodect=1,place=pack"
+                vl = [vo, v]
+                setattr(pr, r, ",".join(vl))
+                entries.append((n, r, ",".join(vl), raw))
+
+        else:
+            desc = getattr(obj.__class__, n, None)
+            if isinstance(desc, PbsAttributeDescriptor) and \
+                    not desc._is_set(obj):
+                desc._set_lazy(obj, v)
+                entries.append((n, None, v, raw))
+                a = a.next
+                continue
+
+            vo = getattr(obj, n)
+
+            if(vo == None):
+                setattr(obj, n, v)
+                entries.append((n, None, v, raw))
+            else:
+                # append value
+                vl = [vo, v]
+                setattr(obj, n, ",".join(vl))
+                entries.append((n, None, ",".join(vl), raw))
+
+        a = a.next
+
+    if server_data_fp:
+        _server_data_write(server_data_fp, objtype, b.name, header_str,
+                           entries)
+    return obj
+
+
+#
+# _static_data: returns the hook_data_reader of the static server data file
+#               if pbs_python was given one in binary format, opened on
+#               first use, or None if the data was loaded by pbs_python.
+_static_data_reader = []
+
+
+def _static_data():
+    if not _static_data_reader:
+        reader = None
+        data_file = _pbs_v1.get_static_data_file()
+        if data_file is not None:
+            try:
+                reader = hook_data_reader(data_file)
+            except (IOError, OSError, ValueError) as e:
+                _pbs_v1.logmsg(_pbs_v1.LOG_WARNING,
+                               "warning: error reading data file %s: %s"
+                               % (data_file, e))
+        _static_data_reader.append(reader)
+    return _static_data_reader[0]
+
+
+#
+# _get_static: like _pbs_v1.get_<objtype>_static(), returns the object of
+#              type 'objtype' named 'name' from the static server data, or
+#              the list of names of such objects if 'name' is "". For a job,
+#              'qname' if set is the queue the job must be in.
+def _get_static(objtype, name, sn, qname=""):
+    reader = _static_data()
+    if reader is None:
+        if objtype == "job":
+            return _pbs_v1.get_job_static(name, sn, qname)
+        elif objtype == "queue":
+            return _pbs_v1.get_queue_static(name, sn)
+        elif objtype == "vnode":
+            return _pbs_v1.get_vnode_static(name, sn)
+        elif objtype == "resv":
+            return _pbs_v1.get_resv_static(name, sn)
+        return _pbs_v1.get_server_static()
+
+    if objtype == "server":
+        names = reader.names("server")
+        if not names:
+            return None
+        name = names[0]
+    elif name == "":
+        return reader.names(objtype)
+
+    b = reader.status(objtype, name)
+    if b is None:
+        return None
+    in_python = _pbs_v1.in_python_mode()
+    _pbs_v1.set_c_mode()
+    try:
+        return _pbs_batch_to_obj(objtype, b, sn, None, None, qname or None)
+    finally:
+        if in_python:
+            _pbs_v1.set_python_mode()
+
+
 #
 # pbs_statobj: general-purpose function that connects to server named
 #           'connect_server' or if None, use "localhost", and depending
@@ -113,12 +456,16 @@ def get_local_nodename():
 #            NOTE: 'filter_queue' is used for a "job" type, which means
 #                  the job must be in the queue 'filter_queue' for the
 #                  job object to be instantiated.
-def pbs_statobj(objtype, name=None, connect_server=None, filter_queue=None):
+#            NOTE: 'attribs' restricts the query to the listed attributes.
+def pbs_statobj(objtype, name=None, connect_server=None, filter_queue=None,
+                attribs=None):
     """
     Returns a PBS (e.g. _job, _queue, _resv, _vnode, _server) object
     that is populated with data obtained by calling PBS APIs:
     pbs_statjob(), pbs_statque(), pbs_statresv(), pbs_statvnode(),
     pbs_statserver(), using a connection handle to 'connect_server'.
+    The connection is pooled and reused by later calls made during the
+    same hook invocation.
 
     If 'objtype'  is "job", then return the _job object.
     If 'objtype'  is "queue", then return the _queue object.
@@ -129,147 +476,105 @@ def pbs_statobj(objtype, name=None, connect_server=None, filter_queue=None):
     'filter_queue' is used for a "job" type, which means
     the job must be in the queue 'filter_queue' for the
     job object to be instantiated.
+
+    'attribs' is an optional list of attribute names (e.g. "comment",
+    "resources_available.ncpus") to fetch; if not given, all the
+    attributes of the object are fetched.
     """
 
     _pbs_v1.set_c_mode()
 
-    if(connect_server == None):
-        con = pbs_connect("localhost")
-    else:
-        con = pbs_connect(connect_server)
-
-    if con < 0:
-        _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
-                       "pbs_statobj: Unable to connect to server %s"
-                       % (connect_server))
-        _pbs_v1.set_python_mode()
-        return None
-
     if(objtype == "job"):
-        bs = pbs_statjob(con, name, None, None)
         header_str = "pbs.server().job(%s)" % (name,)
     elif(objtype == "queue"):
-        bs = pbs_statque(con, name, None, None)
         header_str = "pbs.server().queue(%s)" % (name,)
     elif(objtype == "vnode"):
-        bs = pbs_statvnode(con, name, None, None)
         header_str = "pbs.server().vnode(%s)" % (name,)
     elif(objtype == "resv"):
-        bs = pbs_statresv(con, name, None, None)
         header_str = "pbs.server().resv(%s)" % (name,)
     elif(objtype == "server"):
-        bs = pbs_statserver(con, None, None)
         header_str = "pbs.server()"
     else:
         _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
                        "pbs_statobj: Bad object type %s" % (objtype))
-        pbs_disconnect(con)
         _pbs_v1.set_python_mode()
         return None
 
+    if isinstance(attribs, str):
+        attribs = [attribs]
+    if attribs and (filter_queue != None):
+        attribs = list(attribs) + [ATTR_queue]
+    bs = _pbs_stat(objtype, name, connect_server, attribs)
+
     server_data_fp = get_server_data_fp()
 
     b = bs
     obj = None
     while(b):
-        if(objtype == "job"):
-            obj = _job(b.name, connect_server)
-        elif(objtype == "queue"):
-            obj = _queue(b.name, connect_server)
-        elif(objtype == "vnode"):
-            obj = _vnode(b.name, connect_server)
-        elif(objtype == "resv"):
-            obj = _resv(b.name, connect_server)
-        elif(objtype == "server"):
-            obj = _server(b.name, connect_server)
-        else:
-            _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
-                           "pbs_statobj: Bad object type %s" % (objtype))
-            pbs_disconnect(con)
-            if server_data_fp:
-                server_data_fp.close()
-            _pbs_v1.set_python_mode()
-            return None
+        obj = _pbs_batch_to_obj(objtype, b, connect_server, header_str,
+                                server_data_fp, filter_queue)
+        if obj is None:
+            break
+        b = b.next
 
-        a = b.attribs
-
-        while(a):
-            n = a.name
-            r = a.resource
-            v = a.value
-
-            if(objtype == "vnode"):
-                if(n == ATTR_NODE_state):
-                    v = _pbs_v1.str_to_vnode_state(v)
-                elif(n == ATTR_NODE_ntype):
-                    v = _pbs_v1.str_to_vnode_ntype(v)
-                elif(n == ATTR_NODE_Sharing):
-                    v = _pbs_v1.str_to_vnode_sharing(v)
-
-            elif(objtype == "job"):
-                if((filter_queue != None) and (n == ATTR_queue) and
-                        (filter_queue != v)):
-                    pbs_disconnect(con)
-                    if server_data_fp:
-                        server_data_fp.close()
-                    _pbs_v1.set_python_mode()
-                    return None
-                if n == ATTR_inter or n == ATTR_block or n == ATTR_X11_port:
-                    v = int(pbs_bool(v))
+    if server_data_fp:
+        server_data_fp.close()
+    _pbs_v1.set_python_mode()
+    return obj
 
-            if(r):
-                pr = getattr(obj, n)
 
-                # instantiate Resource_List object if not set
-                if(pr == None):
-                    setattr(obj, n)
+#
+# pbs_statobjs: like pbs_statobj(), but returns a dictionary of objects keyed
+#               by name, obtained through a single pbs_stat*() call.
+def pbs_statobjs(objtype, names=None, connect_server=None, attribs=None):
+    """
+    Returns a dictionary mapping the name of each PBS object of type
+    'objtype' ("job", "queue", "resv", or "vnode") to the object populated
+    with data from the server 'connect_server'.
 
-                pr = getattr(obj, n)
-                if (pr == None):
-                    _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
-                                   "pbs_statobj: missing %s" % (n))
-                    a = a.next
-                    continue
-
-                vo = getattr(pr, r)
-                if(vo == None):
-                    setattr(pr, r, v)
-                    if server_data_fp:
-                        server_data_fp.write(
-                            "%s.%s[%s]=%s\n" % (header_str, n, r, v))
-                else:
-                    # append value...
-                    # example: "select=1:ncpus=1,ncpus=1,nodect=1,place=pack"
-                    vl = [vo, v]
-                    setattr(pr, r, ",".join(vl))
-                    if server_data_fp:
-                        server_data_fp.write("%s.%s[%s]=%s\n" % (
-                            header_str, n, r, ",".join(vl)))
+    If 'names' is given, only those objects are instantiated; names not
+    known to the server are absent from the returned dictionary.
+    Otherwise, all the objects of that type are returned.
 
-            else:
-                vo = getattr(obj, n)
+    'attribs' is an optional list of attribute names to fetch; if not
+    given, all the attributes of the objects are fetched.
+    """
+    objs = {}
+    if objtype not in ("job", "queue", "vnode", "resv"):
+        _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
+                       "pbs_statobjs: Bad object type %s" % (objtype))
+        return objs
+
+    if isinstance(attribs, str):
+        attribs = [attribs]
+    wanted = None
+    name = None
+    if names is not None:
+        wanted = set(names)
+        if len(wanted) == 0:
+            return objs
+        if len(wanted) == 1:
+            name = next(iter(wanted))
 
-                if(vo == None):
-                    setattr(obj, n, v)
-                    if server_data_fp:
-                        server_data_fp.write("%s.%s=%s\n" % (header_str, n, v))
-                else:
-                    # append value
-                    vl = [vo, v]
-                    setattr(obj, n, ",".join(vl))
-                    if server_data_fp:
-                        server_data_fp.write("%s.%s=%s\n" %
-                                             (header_str, n, ",".join(vl)))
+    _pbs_v1.set_c_mode()
+    bs = _pbs_stat(objtype, name, connect_server, attribs)
 
-            a = a.next
+    server_data_fp = get_server_data_fp()
 
+    b = bs
+    while(b):
+        if (wanted is None) or (b.name in wanted):
+            header_str = "pbs.server().%s(%s)" % (objtype, b.name)
+            obj = _pbs_batch_to_obj(objtype, b, connect_server, header_str,
+                                    server_data_fp)
+            if obj is not None:
+                objs[b.name] = obj
         b = b.next
 
-    pbs_disconnect(con)
     if server_data_fp:
         server_data_fp.close()
     _pbs_v1.set_python_mode()
-    return obj
+    return objs
 
 
 # Allow the C implementation of hooks to call pbs_statobj function.
@@ -602,8 +907,12 @@ class _queue():
         super(_queue, self).__setattr__(name, value)
     #: m(__setattr__)
 
-    def job(self, jobid):
-        """Return a job object representing jobid that belongs to queue"""
+    def job(self, jobid, attribs=None):
+        """
+        Return a job object representing jobid that belongs to queue.
+        'attribs', if given, lists the only attributes to query from the
+        server (honored when running under pbs_python).
+        """
 
         if jobid.find(".") == -1:
             jobid = jobid + "." + _pbs_v1.get_pbs_server_name()
@@ -620,19 +929,21 @@ class _queue():
                     qn = ""
                 else:
                     qn = self.name
-                return _pbs_v1.get_job_static(jobid, sn, qn)
+                return _get_static("job", jobid, sn, qn)
 
             return pbs_statobj("job", jobid, self._connect_server,
-                               self.name)
+                               self.name, attribs)
         else:
             return _pbs_v1.get_job(jobid, self.name)
     #: m(job)
 
-    def jobs(self):
+    def jobs(self, attribs=None, page_size=None):
         """
             Returns an iterator that loops over the list of jobs on this queue.
+            'attribs' and 'page_size' are as in server().jobs().
         """
-        return pbs_iter("jobs", "",  self.name, self._connect_server)
+        return pbs_iter("jobs", "",  self.name, self._connect_server,
+                        attribs=attribs, page_size=page_size)
     #: m(jobs)
 
 #: C(_queue)
@@ -670,10 +981,11 @@ class _server():
         return str(self.name)
     #: m(__str__)
 
-    def queue(self, qname):
+    def queue(self, qname, attribs=None):
         """
-        queue(strQname)
+        queue(strQname[, attribs])
             strQname -  name of a PBS queue (without the @host part) to query.
+            attribs  -  optional list of attribute names to query.
 
           Returns a queue object representing the queue <queue name> that is
           managed by server s.
@@ -688,17 +1000,20 @@ class _server():
                     sn = ""
                 else:
                     sn = self._connect_server
-                return _pbs_v1.get_queue_static(qname, sn)
+                return _get_static("queue", qname, sn)
 
-            return pbs_statobj("queue", qname, self._connect_server)
+            return pbs_statobj("queue", qname, self._connect_server,
+                               attribs=attribs)
         else:
             return _pbs_v1.get_queue(qname)
     #: m(queue)
 
-    def job(self, jobid):
+    def job(self, jobid, attribs=None):
         """
-        job(strJobid)
+        job(strJobid[, attribs])
             strJobid - PBS jobid to query.
+            attribs  - optional list of attribute names to query
+                       (e.g. ["comment", "Resource_List.ncpus"]).
           Returns a job object representing jobid
         """
         if jobid.find(".") == -1:
@@ -710,17 +1025,20 @@ class _server():
                     sn = ""
                 else:
                     sn = self._connect_server
-                return _pbs_v1.get_job_static(jobid, sn, "")
+                return _get_static("job", jobid, sn, "")
 
-            return pbs_statobj("job", jobid, self._connect_server)
+            return pbs_statobj("job", jobid, self._connect_server,
+                               attribs=attribs)
         else:
             return _pbs_v1.get_job(jobid)
     #: m(job)
 
-    def vnode(self, vname):
+    def vnode(self, vname, attribs=None):
         """
-        vnode(strVname)
+        vnode(strVname[, attribs])
             strVname - PBS vnode name to query.
+            attribs  - optional list of attribute names to query
+                       (e.g. ["comment", "resources_available.ncpus"]).
           Returns a vnode object representing vname
         """
         if _pbs_v1.get_python_daemon_name() == "pbs_python":
@@ -729,15 +1047,20 @@ class _server():
                     sn = ""
                 else:
                     sn = self._connect_server
-                return _pbs_v1.get_vnode_static(vname, sn)
+                return _get_static("vnode", vname, sn)
 
-            return pbs_statobj("vnode", vname, self._connect_server)
+            return pbs_statobj("vnode", vname, self._connect_server,
+                               attribs=attribs)
         else:
             return _pbs_v1.get_vnode(vname)
     #: m(vnode)
 
-    def resv(self, resvid):
-        """Return a resv object representing resvid"""
+    def resv(self, resvid, attribs=None):
+        """
+        Return a resv object representing resvid.
+        'attribs', if given, lists the only attributes to query from the
+        server (honored when running under pbs_python).
+        """
 
         if _pbs_v1.get_python_daemon_name() == "pbs_python":
             if _pbs_v1.use_static_data():
@@ -745,9 +1068,10 @@ class _server():
                     sn = ""
                 else:
                     sn = self._connect_server
-                return _pbs_v1.get_resv_static(resvid, sn)
+                return _get_static("resv", resvid, sn)
 
-            return pbs_statobj("resv", resvid, self._connect_server)
+            return pbs_statobj("resv", resvid, self._connect_server,
+                               attribs=attribs)
         else:
             return _pbs_v1.get_resv(resvid)
     #: m(resv)
@@ -768,37 +1092,88 @@ class _server():
                             ignore_fin, username)
         #: m(jobs_nas)
     else:
-        def jobs(self):
+        def jobs(self, attribs=None, page_size=None):
             """
             Returns an iterator that loops over the list of jobs
             on this server.
+            In a mom hook, 'attribs' optionally lists the attribute
+            names to fetch (all if not given), and 'page_size' makes the
+            jobs be fetched from the server that many at a time as the
+            iteration advances, instead of all at once.
             """
 
-            return pbs_iter("jobs", "",  "", self._connect_server)
+            return pbs_iter("jobs", "",  "", self._connect_server,
+                            attribs=attribs, page_size=page_size)
         #: m(jobs)
 
-    def vnodes(self):
+    def vnodes(self, attribs=None):
         """
         Returns an iterator that loops over the list of vnodes
         on this server.
+        In a mom hook, 'attribs' optionally lists the attribute names
+        to fetch (all if not given).
         """
 
-        return pbs_iter("vnodes", "",  "", self._connect_server)
+        return pbs_iter("vnodes", "",  "", self._connect_server,
+                        attribs=attribs)
     #: m(vnodes)
 
-    def queues(self):
+    def vnodes_dict(self, names=None, attribs=None):
+        """
+        vnodes_dict([names[, attribs]])
+            names   - optional list of PBS vnode names to query; if not
+                      given, all the vnodes on this server are returned.
+            attribs - optional list of attribute names to query
+                      (e.g. ["comment", "resources_available.ncpus"]).
+          Returns a dictionary mapping vnode names to vnode objects,
+          obtained with a single query to the server. Vnodes in 'names'
+          that are unknown to the server are left out of the dictionary.
+        """
+        if _pbs_v1.get_python_daemon_name() == "pbs_python":
+            if _pbs_v1.use_static_data():
+                if self._connect_server is None:
+                    sn = ""
+                else:
+                    sn = self._connect_server
+                if names is None:
+                    names = _get_static("vnode", "", sn)
+                vdict = {}
+                for vname in names:
+                    vn = _get_static("vnode", vname, sn)
+                    if vn is not None:
+                        vdict[vname] = vn
+                return vdict
+
+            return pbs_statobjs("vnode", names, self._connect_server,
+                                attribs)
+        else:
+            if names is None:
+                return dict((vn.name, vn) for vn in self.vnodes())
+            vdict = {}
+            for vname in names:
+                vn = _pbs_v1.get_vnode(vname)
+                if vn is not None:
+                    vdict[vname] = vn
+            return vdict
+    #: m(vnodes_dict)
+
+    def queues(self, attribs=None):
         """
         Returns an iterator that loops over the list of queues on this server.
+        'attribs' is as in vnodes().
         """
-        return pbs_iter("queues", "",  "", self._connect_server)
+        return pbs_iter("queues", "",  "", self._connect_server,
+                        attribs=attribs)
     #: m(queues)
 
-    def resvs(self):
+    def resvs(self, attribs=None):
         """
         Returns an iterator that loops over the list of reservations on this
         server.
+        'attribs' is as in vnodes().
         """
-        return pbs_iter("resvs", "", "", self._connect_server)
+        return pbs_iter("resvs", "", "", self._connect_server,
+                        attribs=attribs)
     #: m(resvs)
 
     def scheduler_restart_cycle(self):
@@ -841,7 +1216,7 @@ def server():
     if _pbs_v1.get_python_daemon_name() == "pbs_python":
 
         if _pbs_v1.use_static_data():
-            return _pbs_v1.get_server_static()
+            return _get_static("server", "", None)
         connect_server = _pbs_v1.get_pbs_server_name()
         return pbs_statobj("server", None, connect_server)
     else:
@@ -970,6 +1345,14 @@ class pbs_iter():
                 a list of jobs on <queue_name>@<server_name>
 
     connect_server Name of the pbs server to get various stats.
+
+    In pbs_python mode (mom hooks), the following are also accepted:
+
+    attribs        List of attribute names to query (e.g. "comment",
+                   "resources_available.ncpus"); all attributes if None.
+    page_size      For jobs, query the server for at most this many jobs
+                   at a time as the iteration advances, instead of all of
+                   them up front.
     """
     # NAS localmod 014
     if NAS_mod != None and NAS_mod != 0:
@@ -982,7 +1365,7 @@ class pbs_iter():
 
         def __init__(self, pbs_obj_name, pbs_filter1, pbs_filter2,
                      connect_server=None, pbs_ignore_fin=None,
-                     pbs_username=None):
+                     pbs_username=None, attribs=None, page_size=None):
 
             self._caller = _pbs_v1.get_python_daemon_name()
             if self._caller == "pbs_python":
@@ -997,13 +1380,13 @@ class pbs_iter():
                 self.type = pbs_obj_name
                 if _pbs_v1.use_static_data():
                     if(self.type == "jobs"):
-                        self.bs = iter(_pbs_v1.get_job_static("", sn, ""))
+                        self.bs = iter(_get_static("job", "", sn, ""))
                     elif(self.type == "queues"):
-                        self.bs = iter(_pbs_v1.get_queue_static("", sn))
+                        self.bs = iter(_get_static("queue", "", sn))
                     elif(self.type == "vnodes"):
-                        self.bs = iter(_pbs_v1.get_vnode_static("", sn))
+                        self.bs = iter(_get_static("vnode", "", sn))
                     elif(self.type == "resvs"):
-                        self.bs = iter(_pbs_v1.get_resv_static("", sn))
+                        self.bs = iter(_get_static("resv", "", sn))
                     else:
                         _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
                                        "pbs_iter/init: Bad object iterator"
@@ -1012,33 +1395,12 @@ class pbs_iter():
                         return None
                     return
 
-                self.con = pbs_connect(self._connect_server)
-                if self.con < 0:
-                    _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
-                                   "pbs_iter: Unable to connect to server %s"
-                                   % (connect_server))
-                    return None
-
                 if(self.type == "jobs"):
                     _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
                                    "pbs_iter: pbs_python mode not"
                                    " supported by NAS local mod")
-                    pbs_disconnect(self.con)
-                    self.con = -1
-                    return None
-                elif(self.type == "queues"):
-                    self.bs = pbs_statque(self.con, None, None, None)
-                elif(self.type == "vnodes"):
-                    self.bs = pbs_statvnode(self.con, None, None, None)
-                elif(self.type == "resvs"):
-                    self.bs = pbs_statresv(self.con, None, None, None)
-                else:
-                    _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
-                                   "pbs_iter/init: Bad object iterator type %s"
-                                   % (self.type))
-                    pbs_disconnect(self.con)
-                    self.con = -1
                     return None
+                self._stat_init(pbs_filter2, attribs, page_size)
 
             else:
 
@@ -1063,7 +1425,8 @@ class pbs_iter():
                     self.ignore_fin, self.filter_user)
     else:
         def __init__(self, pbs_obj_name, pbs_filter1,
-                     pbs_filter2, connect_server=None):
+                     pbs_filter2, connect_server=None, attribs=None,
+                     page_size=None):
 
             self._caller = _pbs_v1.get_python_daemon_name()
             if self._caller == "pbs_python":
@@ -1078,13 +1441,13 @@ class pbs_iter():
                 self.type = pbs_obj_name
                 if _pbs_v1.use_static_data():
                     if(self.type == "jobs"):
-                        self.bs = iter(_pbs_v1.get_job_static("", sn, ""))
+                        self.bs = iter(_get_static("job", "", sn, ""))
                     elif(self.type == "queues"):
-                        self.bs = iter(_pbs_v1.get_queue_static("", sn))
+                        self.bs = iter(_get_static("queue", "", sn))
                     elif(self.type == "vnodes"):
-                        self.bs = iter(_pbs_v1.get_vnode_static("", sn))
+                        self.bs = iter(_get_static("vnode", "", sn))
                     elif(self.type == "resvs"):
-                        self.bs = iter(_pbs_v1.get_resv_static("", sn))
+                        self.bs = iter(_get_static("resv", "", sn))
                     else:
                         _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
                                        "pbs_iter/init: Bad object "
@@ -1093,28 +1456,7 @@ class pbs_iter():
                         return None
                     return
 
-                self.con = pbs_connect(self._connect_server)
-                if self.con < 0:
-                    _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
-                                   "pbs_iter: Unable to connect to server %s"
-                                   % (connect_server))
-                    return None
-
-                if(self.type == "jobs"):
-                    self.bs = pbs_statjob(self.con, pbs_filter2, None, None)
-                elif(self.type == "queues"):
-                    self.bs = pbs_statque(self.con, None, None, None)
-                elif(self.type == "vnodes"):
-                    self.bs = pbs_statvnode(self.con, None, None, None)
-                elif(self.type == "resvs"):
-                    self.bs = pbs_statresv(self.con, None, None, None)
-                else:
-                    _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
-                                   "pbs_iter/init: Bad object iterator type %s"
-                                   % (self.type))
-                    pbs_disconnect(self.con)
-                    self.con = -1
-                    return None
+                self._stat_init(pbs_filter2, attribs, page_size)
 
             else:
 
@@ -1128,29 +1470,104 @@ class pbs_iter():
     def __iter__(self):
         return self
 
+    # pbs_iter types mapped to pbs_statobj() types, in pbs_python mode
+    _stat_types = {"jobs": "job", "queues": "queue", "vnodes": "vnode",
+                   "resvs": "resv"}
+
+    def _stat_init(self, pbs_filter2, attribs, page_size):
+        """
+        In pbs_python mode, queries the server for the objects to iterate
+        over, restricted to the attribute names in 'attribs' if given.
+        If 'page_size' is given for "jobs", only the job ids are obtained
+        up front, and the jobs are then queried 'page_size' at a time as
+        the iteration advances, instead of holding the status of all of
+        them at once.
+        """
+        self.bs = None
+        self._pending = []
+        if isinstance(attribs, str):
+            attribs = [attribs]
+        self._attribs = attribs
+        self._page_size = page_size
+
+        objtype = self._stat_types.get(self.type)
+        if objtype is None:
+            _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
+                           "pbs_iter/init: Bad object iterator type %s"
+                           % (self.type))
+            return
+        if objtype != "job":
+            self.bs = _pbs_stat(objtype, None, self._connect_server, attribs)
+        elif not page_size:
+            self.bs = _pbs_stat(objtype, pbs_filter2, self._connect_server,
+                                attribs)
+        else:
+            b = _pbs_stat(objtype, pbs_filter2, self._connect_server,
+                          [ATTR_state])
+            while b:
+                self._pending.append(b.name)
+                b = b.next
+    #: m(_stat_init)
+
+    def _stat_next(self):
+        """
+        In pbs_python mode, returns the next object queried from the
+        server, fetching the next page of jobs if needed.
+        """
+        while (not self.bs) and self._pending:
+            page = self._pending[:self._page_size]
+            del self._pending[:self._page_size]
+            self.bs = _pbs_stat("job", ",".join(page), self._connect_server,
+                                self._attribs)
+            if self.bs:
+                continue
+            if _pbs_stat_failed:
+                _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
+                               "pbs_iter/next: Unable to query jobs %s, "
+                               "skipping them" % (",".join(page)))
+            else:
+                _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
+                               "pbs_iter/next: Jobs %s no longer exist"
+                               % (",".join(page)))
+        b = self.bs
+        if not b:
+            raise StopIteration
+
+        objtype = self._stat_types[self.type]
+        _pbs_v1.set_c_mode()
+        server_data_fp = get_server_data_fp()
+        try:
+            obj = _pbs_batch_to_obj(objtype, b, self._connect_server,
+                                    "pbs.server().%s(%s)" % (objtype, b.name),
+                                    server_data_fp)
+        finally:
+            if server_data_fp:
+                server_data_fp.close()
+            _pbs_v1.set_python_mode()
+        self.bs = b.next
+        return obj
+    #: m(_stat_next)
+
     # NAS localmod 014
     if NAS_mod != None and NAS_mod != 0:
         def __next__(self):
             if self._caller == "pbs_python":
-                if not hasattr(self, "bs") or self.bs == None:
-                    if not _pbs_v1.use_static_data():
-                        pbs_disconnect(self.con)
-                        self.con = -1
+                if not hasattr(self, "bs"):
                     raise StopIteration
 
                 if _pbs_v1.use_static_data():
                     if(self.type == "jobs"):
-                        return _pbs_v1.get_job_static(next(self.bs),
-                                                      self._connect_server, "")
+                        return _get_static("job", next(self.bs),
+                                           self._connect_server, "")
                     elif(self.type == "queues"):
-                        return _pbs_v1.get_queue_static(next(self.bs),
-                                                        self._connect_server)
+                        return _get_static("queue", next(self.bs),
+                                           self._connect_server)
                     elif(self.type == "resvs"):
-                        return _pbs_v1.get_resv_static(next(self.bs),
-                                                       self._connect_server)
+                        return _get_static("resv", next(self.bs),
+                                           self._connect_server)
                     elif(self.type == "vnodes"):
-                        return _pbs_v1.get_vnode_static(next(self.bs),
-                                                        self._connect_server)
+                        return _get_static("vnode", next(self.bs),
+                                           self._connect_server)
                     else:
                         _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
                                        "pbs_iter/next: Bad object"
@@ -1159,117 +1576,7 @@ class pbs_iter():
                         raise StopIteration
                     return
 
-                b = self.bs
-                job = None
-
-                _pbs_v1.set_c_mode()
-                server_data_fp = get_server_data_fp()
-                if(b):
-                    if(self.type == "jobs"):
-                        _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
-                                       "pbs_iter/next: pbs_python mode not"
-                                       " supported by NAS local mod")
-                        pbs_disconnect(self.con)
-                        if server_data_fp:
-                            server_data_fp.close()
-                        self.con = -1
-                        _pbs_v1.set_python_mode()
-                        raise StopIteration
-                    elif(self.type == "queues"):
-                        obj = _queue(b.name, self._connect_server)
-                        header_str = "pbs.server().queue(%s)" % (b.name,)
-                    elif(self.type == "resvs"):
-                        obj = _resv(b.name, self._connect_server)
-                        header_str = "pbs.server().resv(%s)" % (b.name,)
-                    elif(self.type == "vnodes"):
-                        obj = _vnode(b.name, self._connect_server)
-                        header_str = "pbs.server().vnode(%s)" % (b.name,)
-                    else:
-                        _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
-                                       "pbs_iter/next: Bad object iterator "
-                                       "type %s"
-                                       % (self.type))
-                        pbs_disconnect(self.con)
-                        if server_data_fp:
-                            server_data_fp.close()
-                        self.con = -1
-                        _pbs_v1.set_python_mode()
-                        raise StopIteration
-
-                    a = b.attribs
-
-                    while(a):
-                        n = a.name
-                        r = a.resource
-                        v = a.value
-
-                        if(self.type == "vnodes"):
-                            if(n == ATTR_NODE_state):
-                                v = _pbs_v1.str_to_vnode_state(v)
-                            elif(n == ATTR_NODE_ntype):
-                                v = _pbs_v1.str_to_vnode_ntype(v)
-                            elif(n == ATTR_NODE_Sharing):
-                                v = _pbs_v1.str_to_vnode_sharing(v)
-
-                        if(self.type == "jobs"):
-                            if n == ATTR_inter or n == ATTR_block or \
-                                    n == ATTR_X11_port:
-                                v = int(pbs_bool(v))
-
-                        if(r):
-                            pr = getattr(obj, n)
-
-                            # if resource list does not exist, then set it
-                            if(pr == None):
-                                setattr(obj, n)
-
-                            pr = getattr(obj, n)
-                            if (pr == None):
-                                _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
-                                               "pbs_statobj: missing %s" % (n))
-                                a = a.next
-                                continue
-
-                            vo = getattr(pr, r)
-                            if(vo == None):
-                                setattr(pr, r, v)
-                                if server_data_fp:
-                                    server_data_fp.write(
-                                        "%s.%s[%s]=%s\n" % (header_str, n,
-                                                            r, v))
-                            else:
-                                # append value:
-                                # example: "select=1:ncpus=1,ncpus=1,nodect=1,
-                                # place=pack"
-                                vl = [vo, v]
-                                setattr(pr, r, ",".join(vl))
-                                if server_data_fp:
-                                    server_data_fp.write("%s.%s[%s]=%s\n" % (
-                                        header_str, n, r, ",".join(vl)))
-
-                        else:
-                            vo = getattr(obj, n)
-
-                            if(vo == None):
-                                setattr(obj, n, v)
-                                if server_data_fp:
-                                    server_data_fp.write(
-                                        "%s.%s=%s\n" % (header_str, n, v))
-                            else:
-                                vl = [vo, v]
-                                setattr(obj, n, ",".join(vl))
-                                if server_data_fp:
-                                    server_data_fp.write("%s.%s=%s\n" % (
-                                        header_str, n, ",".join(vl)))
-
-                        a = a.next
-
-                self.bs = b.next
-
-                if server_data_fp:
-                    server_data_fp.close()
-                _pbs_v1.set_python_mode()
-                return obj
+                return self._stat_next()
             else:
                 # argument 0 below tells C function we're inside next
                 return _pbs_v1.iter_nextfunc(self, 0, self.obj_name,
@@ -1279,26 +1586,23 @@ class pbs_iter():
     else:
         def __next__(self):
             if self._caller == "pbs_python":
-                if not hasattr(self, "bs") or self.bs == None:
-                    if not _pbs_v1.use_static_data():
-                        pbs_disconnect(self.con)
-                        self.con = -1
+                if not hasattr(self, "bs"):
                     raise StopIteration
 
                 if _pbs_v1.use_static_data():
                     if(self.type == "jobs"):
-                        return _pbs_v1.get_job_static(next(self.bs),
-                                                      self._connect_server,
-                                                      "")
+                        return _get_static("job", next(self.bs),
+                                           self._connect_server,
+                                           "")
                     elif(self.type == "queues"):
-                        return _pbs_v1.get_queue_static(next(self.bs),
-                                                        self._connect_server)
+                        return _get_static("queue", next(self.bs),
+                                           self._connect_server)
                     elif(self.type == "resvs"):
-                        return _pbs_v1.get_resv_static(next(self.bs),
-                                                       self._connect_server)
+                        return _get_static("resv", next(self.bs),
+                                           self._connect_server)
                     elif(self.type == "vnodes"):
-                        return _pbs_v1.get_vnode_static(next(self.bs),
-                                                        self._connect_server)
+                        return _get_static("vnode", next(self.bs),
+                                           self._connect_server)
                     else:
                         _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
                                        "pbs_iter/next: Bad object"
@@ -1307,111 +1611,7 @@ class pbs_iter():
                         raise StopIteration
                     return
 
-                b = self.bs
-                job = None
-
-                _pbs_v1.set_c_mode()
-
-                server_data_fp = get_server_data_fp()
-                if(b):
-                    if(self.type == "jobs"):
-                        obj = _job(b.name, self._connect_server)
-                        header_str = "pbs.server().job(%s)" % (b.name,)
-                    elif(self.type == "queues"):
-                        obj = _queue(b.name, self._connect_server)
-                        header_str = "pbs.server().queue(%s)" % (b.name,)
-                    elif(self.type == "resvs"):
-                        obj = _resv(b.name, self._connect_server)
-                        header_str = "pbs.server().resv(%s)" % (b.name,)
-                    elif(self.type == "vnodes"):
-                        obj = _vnode(b.name, self._connect_server)
-                        header_str = "pbs.server().vnode(%s)" % (b.name,)
-                    else:
-                        _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
-                                       "pbs_iter/next: Bad object"
-                                       " iterator type %s"
-                                       % (self.type))
-                        pbs_disconnect(self.con)
-                        if server_data_fp:
-                            server_data_fp.close()
-                        self.con = -1
-                        _pbs_v1.set_python_mode()
-                        raise StopIteration
-
-                    a = b.attribs
-
-                    while(a):
-                        n = a.name
-                        r = a.resource
-                        v = a.value
-
-                        if(self.type == "vnodes"):
-                            if(n == ATTR_NODE_state):
-                                v = _pbs_v1.str_to_vnode_state(v)
-                            elif(n == ATTR_NODE_ntype):
-                                v = _pbs_v1.str_to_vnode_ntype(v)
-                            elif(n == ATTR_NODE_Sharing):
-                                v = _pbs_v1.str_to_vnode_sharing(v)
-
-                        if(self.type == "jobs"):
-                            if n == ATTR_inter or n == ATTR_block or \
-                                    n == ATTR_X11_port:
-                                v = int(pbs_bool(v))
-
-                        if(r):
-                            pr = getattr(obj, n)
-
-                            # if resource list does not exist, then set it
-                            if(pr == None):
-                                setattr(obj, n)
-
-                            pr = getattr(obj, n)
-                            if (pr == None):
-                                _pbs_v1.logmsg(_pbs_v1.LOG_DEBUG,
-                                               "pbs_statobj: missing %s" % (n))
-                                a = a.__next__
-                                continue
-
-                            vo = getattr(pr, r)
-                            if(vo == None):
-                                setattr(pr, r, v)
-                                if server_data_fp:
-                                    server_data_fp.write(
-                                        "%s.%s[%s]=%s\n" % (header_str, n, r,
-                                                            v))
-                            else:
-                                # append value:
-                                # example: "select=1:ncpus=1,ncpus=1,nodect=1,
-                                # place=pack"
-                                vl = [vo, v]
-                                setattr(pr, r, ",".join(vl))
-                                if server_data_fp:
-                                    server_data_fp.write("%s.%s[%s]=%s\n" % (
-                                        header_str, n, r, ",".join(vl)))
-
-                        else:
-                            vo = getattr(obj, n)
-
-                            if(vo == None):
-                                setattr(obj, n, v)
-                                if server_data_fp:
-                                    server_data_fp.write(
-                                        "%s.%s=%s\n" % (header_str, n, v))
-                            else:
-                                vl = [vo, v]
-                                setattr(obj, n, ",".join(vl))
-                                if server_data_fp:
-                                    server_data_fp.write("%s.%s=%s\n" % (
-                                        header_str, n, ",".join(vl)))
-
-                        a = a.next
-
-                self.bs = b.next
-
-                _pbs_v1.set_python_mode()
-                if server_data_fp:
-                    server_data_fp.close()
-                return obj
+                return self._stat_next()
             else:
                 # argument 0 below tells C function we're inside next
                 return _pbs_v1.iter_nextfunc(self, 0, self.obj_name,
@@ -1530,6 +1730,23 @@ _management._connect_server = PbsAttributeDescriptor(
 management = _management
 
 
+#:------------------------------------------------------------------------
+#                  Per event object bookkeeping
+#:-------------------------------------------------------------------------
+def _release_event_objects():
+    """
+    Releases the bookkeeping the classes keep about their instances (the
+    attributes set by a hook and the unknown resources), which would
+    otherwise keep every object ever touched by a hook alive in a long
+    running interpreter. This is called by PBS when it sets up a new
+    event, once it is done with the objects of the previous one.
+    """
+    for cls in (_job, _vnode, _resv, _server_attribute, _management,
+                pbs_resource):
+        cls._attributes_hook_set.clear()
+    pbs_resource._attributes_unknown.clear()
+
+
 #:------------------------------------------------------------------------
 #                  Reverse Lookup for _pv1mod_insert_int_constants
 #:-------------------------------------------------------------------------
@@ -56,6 +56,7 @@
  * 	node_pcpu_action()
  * 	pbs_python_populate_svrattrl_from_file()
  * 	pbs_python_populate_server_svrattrl_from_file()
+ * 	hook_data_is_binary()
  * 	fprint_svrattrl_list()
  * 	fprint_str_array()
  * 	argv_list_to_str()
@@ -640,6 +641,34 @@ populate_svrattrl_fail:
 	return (rc);
 }
 
+/**
+ * @brief
+ *		Tells if 'data_file' is a hook data file in the binary format
+ *		written by the pbs.v1 module, which decodes it on demand.
+ *
+ * @param[in]	data_file	-	pathname to the hook data file.
+ *
+ * @return	int
+ * @retval	1	: the file starts with HOOK_DATA_BINARY_MAGIC
+ * @retval	0	: otherwise, or the file could not be read
+ */
+static int
+hook_data_is_binary(char *data_file)
+{
+	char	magic[sizeof(HOOK_DATA_BINARY_MAGIC)];
+	size_t	len = sizeof(HOOK_DATA_BINARY_MAGIC) - 1;
+	FILE	*fp;
+	int	ret = 0;
+
+	if ((fp = fopen(data_file, "rb")) == NULL)
+		return 0;
+	if ((fread(magic, 1, len, fp) == len) &&
+		(memcmp(magic, HOOK_DATA_BINARY_MAGIC, len) == 0))
+		ret = 1;
+	fclose(fp);
+	return ret;
+}
+
 /**
  *
  * @brief
@@ -1845,7 +1874,10 @@ main(int argc, char *argv[], char *envp[])
 			fprintf(stderr, "%s: failed to populate svrattrl \n", argv[0]);
 			exit(2);
 		}
-		if (the_data[0] != '\0') {
+		if ((the_data[0] != '\0') && hook_data_is_binary(the_data)) {
+			/* decoded on demand by the pbs.v1 module */
+			pbs_python_set_static_data_file(the_data);
+		} else if (the_data[0] != '\0') {
 			CLEAR_HEAD(server);
 			CLEAR_HEAD(server_jobs);
 			CLEAR_HEAD(server_jobs_ids);
@@ -194,6 +194,31 @@ class TestAlpsInventoryCheckHook(TestFunctional):
             max_attempts=10,
             interval=2)
 
+    def test_inventory_checksum(self):
+        """
+        Test that the checksum of an inventory found in sync is saved
+        in mom_priv, and that a node deleted from PBS is still reported
+        once the saved checksum no longer matches the inventory.
+        """
+        now = time.time()
+        self.mom.log_match(
+            "ALPS Inventory Check: PBS and ALPS are in sync",
+            starttime=now,
+            max_attempts=10,
+            interval=2)
+        inventory = os.path.join(self.mom.pbs_conf['PBS_HOME'], 'mom_priv',
+                                 'hooks', 'PBS_alps_inventory_check.inventory')
+        self.assertTrue(self.du.isfile(self.mom.hostname, inventory,
+                                       sudo=True))
+        now = time.time()
+        self.delete_cray_compute_node()
+        self.mom.log_match(
+            "ALPS Inventory Check: Compute " +
+            "nodes defined in ALPS, but not in PBS",
+            starttime=now,
+            max_attempts=10,
+            interval=2)
+
     def test_nodes_out_of_sync(self):
         """
          Test the log when PBS and ALPS are out of sync
@@ -39,6 +39,7 @@
 
 
 import glob
+import json
 
 from tests.functional import *
 
@@ -2164,6 +2165,142 @@ if %s e.job.in_ms_mom():
                                     interval=1, tail=False, n='ALL')
         self.logger.info('suppress_gpu_discovery check passed')
 
+    def test_devices_topology_cache(self):
+        """
+        Test to verify that the devices discovered at exechost_startup
+        are saved in mom_priv and reused by later events
+        """
+        if not self.paths[self.hosts_list[0]]['devices']:
+            self.skipTest('Skipping test since no devices subsystem defined')
+        name = 'CGROUP3'
+        self.load_config(self.cfg14 % ('false', 'true'))
+        pbs_home = self.mom.pbs_conf['PBS_HOME']
+        topology_file = os.path.join(pbs_home, 'mom_priv', 'hooks',
+                                     'pbs_cgroups.topology')
+
+        # Restart mom for changes made by cgroups hook to take effect
+        begin = time.time()
+        # sleep 5s to ensure log matching will not catch older log lines
+        time.sleep(5)
+        self.mom.restart()
+        self.moms_list[0].log_match('Hook handler returned success'
+                                    ' for exechost_startup',
+                                    starttime=begin, existence=True,
+                                    interval=1, tail=False)
+        self.assertTrue(self.du.isfile(hostname=self.hosts_list[0],
+                                       path=topology_file, sudo=True),
+                        'Topology file %s not found' % topology_file)
+
+        # The execjob_begin event must not rediscover the devices
+        begin = time.time()
+        a = {'Resource_List.select': '1:ncpus=1:host=%s' %
+             self.hosts_list[0], ATTR_N: name}
+        j = Job(TEST_USER, attrs=a)
+        j.create_script(self.sleep15_job)
+        jid = self.server.submit(j)
+        self.server.expect(JOB, {'job_state': 'R'}, id=jid)
+        self.moms_list[0].log_match('Using devices from %s' % topology_file,
+                                    starttime=begin, existence=True,
+                                    max_attempts=2, interval=1, tail=False,
+                                    n='ALL')
+        self.logger.info('devices_topology_cache check passed')
+
+    def test_cgroup_config_snapshot(self):
+        """
+        Test to verify that events reuse the configuration parsed by a
+        previous event, and that a new hook configuration takes effect
+        """
+        if not self.paths[self.hosts_list[0]]['memory']:
+            self.skipTest('Test requires memory subystem mounted')
+        self.load_config(self.cfg4 % (self.mem, self.swapctl))
+        pbs_home = self.mom.pbs_conf['PBS_HOME']
+        snapshot_file = os.path.join(pbs_home, 'mom_priv', 'hooks',
+                                     'pbs_cgroups.config')
+        begin = time.time()
+        a = {'Resource_List.select': '1:ncpus=1:host=%s' %
+             self.hosts_list[0]}
+        j = Job(TEST_USER, attrs=a)
+        j.create_script(self.sleep30_job)
+        jid = self.server.submit(j)
+        self.server.expect(JOB, {'job_state': 'R'}, id=jid)
+        self.moms_list[0].log_match('Using configuration from %s' %
+                                    snapshot_file, starttime=begin,
+                                    max_attempts=5, interval=1, n='ALL')
+        self.server.delete(id=jid, wait=True)
+        # A new default memory limit must not be hidden by the snapshot
+        self.load_config(self.cfg4.replace('"default"         : "96MB"',
+                                           '"default"         : "128MB"',
+                                           1) % (self.mem, self.swapctl))
+        j = Job(TEST_USER, attrs=a)
+        j.create_script(self.sleep30_job)
+        jid = self.server.submit(j)
+        self.server.expect(JOB, {'job_state': 'R'}, id=jid)
+        fn = os.path.join(self.get_cgroup_job_dir('memory', jid,
+                                                  self.hosts_list[0]),
+                          'memory.limit_in_bytes')
+        result = self.du.cat(hostname=self.hosts_list[0], filename=fn,
+                             sudo=True)
+        self.assertEqual(result['rc'], 0, 'Could not read %s' % fn)
+        self.assertEqual(int(result['out'][0]), 128 * 1024 * 1024)
+
+    def test_cgroup_vnodes_unchanged(self):
+        """
+        Test to verify that a MoM restart does not send the resources of
+        the per-NUMA vnodes again when they did not change, and that the
+        server keeps these vnodes, free to run jobs
+        """
+        self.load_config(self.cfg3 % ('', 'true', '', self.mem, '',
+                                      self.swapctl, ''))
+        self.mom.restart()
+        vnode = '%s[0]' % self.nodes_list[0]
+        self.server.expect(VNODE, {'state': 'free'}, id=vnode, interval=3)
+        ncpus = self.server.status(VNODE, 'resources_available.ncpus',
+                                   id=vnode)[0]['resources_available.ncpus']
+        begin = time.time()
+        self.mom.restart()
+        self.moms_list[0].log_match('Vnodes unchanged since last published',
+                                    starttime=begin, max_attempts=10,
+                                    interval=1)
+        self.server.expect(VNODE, {'state': 'free',
+                                   'resources_available.ncpus': ncpus},
+                           id=vnode, interval=3)
+        # A stale vnode would not run the job
+        a = {'Resource_List.select': '1:ncpus=1:vnode=%s' % vnode}
+        j = Job(TEST_USER, attrs=a)
+        j.set_sleep_time(10)
+        jid = self.server.submit(j)
+        self.server.expect(JOB, {'job_state': 'R'}, id=jid)
+        for vn in self.server.status(VNODE, 'state'):
+            if vn['id'].startswith(self.nodes_list[0] + '['):
+                self.assertNotIn('stale', vn['state'])
+
+    def test_cgroup_vnodes_recreated(self):
+        """
+        Test to verify that a MoM restart sends the resources of the
+        per-NUMA vnodes again when the server lost them, after they were
+        changed by hand or deleted and created again
+        """
+        self.load_config(self.cfg3 % ('', 'true', '', self.mem, '',
+                                      self.swapctl, ''))
+        self.mom.restart()
+        vnode = '%s[0]' % self.nodes_list[0]
+        self.server.expect(VNODE, {'state': 'free'}, id=vnode, interval=3)
+        mem = self.server.status(VNODE, 'resources_available.mem',
+                                 id=vnode)[0]['resources_available.mem']
+        self.server.manager(MGR_CMD_SET, NODE,
+                            {'resources_available.mem': '1mb'}, id=vnode)
+        self.mom.restart()
+        self.server.expect(VNODE, {'state': 'free',
+                                   'resources_available.mem': mem},
+                           id=vnode, interval=3)
+        self.server.manager(MGR_CMD_DELETE, NODE, None, "")
+        for host in self.hosts_list:
+            self.server.manager(MGR_CMD_CREATE, NODE, id=host)
+        self.mom.restart()
+        self.server.expect(VNODE, {'state': 'free',
+                                   'resources_available.mem': mem},
+                           id=vnode, interval=3)
+
     def test_cgroup_cpuset(self):
         """
         Test to verify that 2 jobs are not assigned the same cpus
@@ -2800,6 +2937,216 @@ if %s e.job.in_ms_mom():
                 break
         self.assertFalse(self.is_dir(cpath, ehost1))
 
+    def run_job_array(self, name, script=None):
+        """
+        Submit an array job of one CPU subjobs to the first host, one per
+        CPU up to eight of them, and wait for all the subjobs to run.
+        Skips the test on hosts with less than four CPUs. Returns the
+        array job id and the list of subjob ids.
+        """
+        pcpus = 0
+        with open('/proc/cpuinfo', 'r') as desc:
+            for line in desc:
+                if re.match('^processor', line):
+                    pcpus += 1
+        if pcpus < 4:
+            self.skipTest('Test requires at least four physical CPUs')
+        nsubjobs = min(pcpus, 8)
+        self.load_config(self.cfg3 % ('', 'false', '', self.mem, '',
+                                      self.swapctl, ''))
+        # Restart mom for cgroups hook changes to take effect
+        self.mom.restart()
+        a = {'Resource_List.select': '1:ncpus=1:mem=100mb:host=%s' %
+             self.hosts_list[0], ATTR_N: name, ATTR_J: '1-%d' % nsubjobs}
+        j = Job(TEST_USER, attrs=a)
+        if script:
+            j.create_script(script)
+        else:
+            j.set_sleep_time(60)
+        jid = self.server.submit(j)
+        self.server.expect(JOB, {'job_state': 'B'}, jid)
+        subjobs = []
+        for idx in range(1, nsubjobs + 1):
+            subj = jid.replace('[]', '[%d]' % idx)
+            self.server.expect(JOB, {'job_state': 'R'}, subj)
+            subjobs.append(subj)
+        return (jid, subjobs)
+
+    def test_cgroup_job_array_cpusets(self):
+        """
+        Test that subjobs set up concurrently on a host are assigned
+        different CPUs
+        """
+        if not self.paths[self.hosts_list[0]]['cpuset']:
+            self.skipTest('Test requires cpuset subsystem mounted')
+        (_, subjobs) = self.run_job_array('CGROUP17')
+        cpus = []
+        for subj in subjobs:
+            fn = os.path.join(self.get_cgroup_job_dir('cpuset', subj,
+                                                      self.hosts_list[0]),
+                              'cpuset.cpus')
+            result = self.du.cat(hostname=self.hosts_list[0], filename=fn,
+                                 sudo=True)
+            self.assertEqual(result['rc'], 0, 'Could not read %s' % fn)
+            cpus.append(result['out'][0].strip())
+        self.logger.info('Subjob CPUs: %s' % cpus)
+        self.assertEqual(len(set(cpus)), len(subjobs),
+                         'Subjobs should be assigned different CPUs')
+
+    def test_cgroup_job_array_teardown(self):
+        """
+        Test that the cgroups of subjobs deleted together, each running
+        several processes, are all removed without offlining the node
+        """
+        (jid, subjobs) = self.run_job_array('CGROUP21', """#!/bin/bash
+#PBS -joe
+sleep 300 &
+sleep 300 &
+sleep 300 &
+wait
+""")
+        jobdirs = []
+        for subj in subjobs:
+            jobdir = self.get_cgroup_job_dir('memory', subj,
+                                             self.hosts_list[0])
+            self.assertTrue(self.is_dir(jobdir, self.hosts_list[0]))
+            jobdirs.append(jobdir)
+        begin = time.time()
+        self.server.delete(id=jid, wait=True)
+        for jobdir in jobdirs:
+            self.assertFalse(self.is_dir(jobdir, self.hosts_list[0]))
+        self.mom.log_match('cgroup still has', starttime=begin,
+                           existence=False, max_attempts=1, n='ALL')
+        self.server.expect(NODE, {'state': 'free'},
+                           id=self.nodes_list[0])
+
+    def test_cgroup_v2_files(self):
+        """
+        Test the cgroup v2 paths, file names and values of the hook on a
+        mock unified hierarchy, which does not require a cgroup v2 host
+        """
+        hook_body = """
+import json
+import os
+import shutil
+import tempfile
+import pbs
+
+hook_file = '%s'
+ns = {'__name__': 'pbs_cgroups'}
+with open(hook_file) as desc:
+    exec(compile(desc.read(), hook_file, 'exec'), ns)
+CgroupUtils = ns['CgroupUtils']
+root = tempfile.mkdtemp()
+result = {}
+try:
+    with open(os.path.join(root, 'cgroup.controllers'), 'w') as desc:
+        desc.write('cpuset cpu io memory hugetlb pids\\n')
+    subtree = {'': 'cpu\\n', 'pbs_jobs.service': '',
+               'pbs_jobs.service/jobid': ''}
+    for (path, value) in subtree.items():
+        os.makedirs(os.path.join(root, path), exist_ok=True)
+        with open(os.path.join(root, path, 'cgroup.subtree_control'),
+                  'w') as desc:
+            desc.write(value)
+    cg = CgroupUtils.__new__(CgroupUtils)
+    cg.cfg = {'cgroup_prefix': 'pbs_jobs',
+              'cgroup': {'cpu': {'zero_cpus_shares_fraction': 0.002,
+                                 'zero_cpus_quota_fraction': 0.2,
+                                 'enforce_per_period_quota': False,
+                                 'cfs_period_us': 100000,
+                                 'cfs_quota_fudge_factor': 1.03}}}
+    cg.cgroup_v2 = False
+    cg.paths = cg._get_paths_v2(root)
+    cg.subsystems = ['cpu', 'cpuacct', 'memory', 'memsw']
+    result['cgroup_v2'] = cg.cgroup_v2
+    result['paths'] = sorted(set(cg.paths.values()))
+    result['subsystems'] = sorted(cg.paths)
+    jobid = '1.svr'
+    jobdir = os.path.join(root, 'pbs_jobs.service', 'jobid', jobid)
+    os.makedirs(jobdir)
+    result['files'] = dict(
+        ['%%s/%%s' %% (x, y), os.path.relpath(cg._cgroup_path(x, y, jobid),
+                                            root)]
+        for (x, y) in [('memory', 'limit_in_bytes'),
+                       ('memory', 'soft_limit_in_bytes'),
+                       ('memsw', 'limit_in_bytes'),
+                       ('hugetlb', 'limit_in_bytes'),
+                       ('cpu', 'shares'), ('cpu', 'cfs_quota_us'),
+                       ('cpuset', 'cpus'), ('memory', 'tasks')])
+    cg.set_limit('mem', '1gb', jobid)
+    cg.set_limit('vmem', '3gb', jobid)
+    cg.set_limit('ncpus', 4, jobid)
+    values = {}
+    for name in ['memory.max', 'memory.swap.max', 'cpu.weight']:
+        with open(os.path.join(jobdir, name)) as desc:
+            values[name] = desc.read().strip()
+    cg.set_limit('ncpus', 0, jobid)
+    for name in ['cpu.weight', 'cpu.max']:
+        with open(os.path.join(jobdir, name)) as desc:
+            values['zero ' + name] = desc.read().strip()
+    result['values'] = values
+    cg._create_paths_v2()
+    result['subtree_control'] = {}
+    for path in subtree:
+        with open(os.path.join(root, path, 'cgroup.subtree_control')) as desc:
+            result['subtree_control'][path] = desc.read().strip()
+    counters = {'memory.peak': '1000', 'memory.swap.peak': '500',
+                'memory.events': 'low 0\\nhigh 0\\nmax 2\\noom 0',
+                'memory.swap.events': 'high 0\\nmax 1\\nfail 0',
+                'cpu.stat': 'usage_usec 3000000\\nuser_usec 2000000'}
+    for (name, value) in counters.items():
+        with open(os.path.join(jobdir, name), 'w') as desc:
+            desc.write(value + '\\n')
+    result['usage'] = cg.gather_jobs_usage([jobid])[jobid]
+finally:
+    shutil.rmtree(root)
+pbs.logmsg(pbs.LOG_DEBUG, 'cgroup_v2_check=' + json.dumps(result))
+pbs.event().accept()
+""" % self.hook_file
+        attr = {'enabled': 'true', 'event': 'queuejob'}
+        self.server.create_import_hook('cgroup_v2_check', attr, hook_body)
+        start = time.time()
+        self.server.submit(Job(TEST_USER))
+        out = self.server.log_match('cgroup_v2_check=', starttime=start)
+        result = json.loads(out[1].split('cgroup_v2_check=', 1)[1])
+        self.logger.info('cgroup v2 check: %s' % result)
+        self.assertTrue(result['cgroup_v2'])
+        # every controller shares the directory of the jobs, and there is
+        # no devices controller
+        self.assertEqual(len(result['paths']), 1)
+        self.assertTrue(result['paths'][0].endswith('/pbs_jobs.service/'
+                                                    'jobid/'))
+        self.assertNotIn('devices', result['subsystems'])
+        self.assertIn('memsw', result['subsystems'])
+        jobdir = os.path.join('pbs_jobs.service', 'jobid', '1.svr')
+        files = {'memory/limit_in_bytes': 'memory.max',
+                 'memory/soft_limit_in_bytes': 'memory.low',
+                 'memsw/limit_in_bytes': 'memory.swap.max',
+                 'hugetlb/limit_in_bytes': 'hugetlb.2MB.max',
+                 'cpu/shares': 'cpu.weight',
+                 'cpu/cfs_quota_us': 'cpu.max',
+                 'cpuset/cpus': 'cpuset.cpus',
+                 'memory/tasks': 'cgroup.procs'}
+        for (key, name) in files.items():
+            self.assertEqual(result['files'][key],
+                             os.path.join(jobdir, name))
+        # vmem limits memory plus swap, cgroup v2 limits swap alone
+        values = {'memory.max': str(2 ** 30),
+                  'memory.swap.max': str(2 * 2 ** 30),
+                  # 4000 shares out of 262144
+                  'cpu.weight': '153',
+                  # the 2 shares minimum maps to the minimum weight
+                  'zero cpu.weight': '1',
+                  'zero cpu.max': '20600 100000'}
+        self.assertEqual(result['values'], values)
+        subtree = {'': '+memory', 'pbs_jobs.service': '+cpu +memory',
+                   'pbs_jobs.service/jobid': '+cpu +memory'}
+        self.assertEqual(result['subtree_control'], subtree)
+        usage = {'mem': 1000, 'mem_failcnt': 2, 'vmem': 1500,
+                 'vmem_failcnt': 1, 'cput': 3000000000}
+        self.assertEqual(result['usage'], usage)
+
     @requirements(num_moms=2)
     def test_cgroup_cleanup(self):
         """
@@ -3228,6 +3575,40 @@ if %s e.job.in_ms_mom():
         else:
             self.assertFalse(1, "File %s not present" % fpath)
 
+    def test_cgroup_assigned_resources_ledger(self):
+        """
+        Test that the resources assigned to a job are recorded in the
+        ledger while it runs and removed from it once it is deleted
+        """
+        name = 'CGROUP1'
+        self.load_config(self.cfg3 % ('', 'false', '', self.mem, '',
+                                      self.swapctl, ''))
+        # Restart mom for changes made by cgroups hook to take effect
+        self.mom.restart()
+        pbs_home = self.mom.pbs_conf['PBS_HOME']
+        ledger = os.path.join(pbs_home, 'mom_priv', 'hooks', 'hook_data',
+                              'cgroup_ledger')
+        a = {'Resource_List.select': '1:ncpus=1:mem=300mb:host=%s' %
+             self.hosts_list[0], ATTR_N: name}
+        j = Job(TEST_USER, attrs=a)
+        j.set_sleep_time(60)
+        jid = self.server.submit(j)
+        self.server.expect(JOB, {'job_state': 'R'}, jid)
+        result = self.du.cat(hostname=self.hosts_list[0], filename=ledger,
+                             sudo=True)
+        self.assertEqual(result['rc'], 0, 'Could not read %s' % ledger)
+        self.assertIn(jid, ''.join(result['out']))
+        self.server.delete(id=jid, wait=True)
+        # retry 10 times (for 20 seconds max. in total)
+        # if the job is still in the ledger...
+        for trial in range(0, 10):
+            result = self.du.cat(hostname=self.hosts_list[0],
+                                 filename=ledger, sudo=True)
+            if jid not in ''.join(result['out']):
+                break
+            time.sleep(2)
+        self.assertNotIn(jid, ''.join(result['out']))
+
     def test_cgroup_periodic_update_known_jobs(self):
         """
         Verify that jobs known to mom are updated, not orphans
@@ -3350,6 +3731,47 @@ event.accept()
         self.moms_list[0].log_match(msg=logmsg, starttime=presubmit,
                                     max_attempts=1, existence=False)
 
+    def test_cgroup_gather_jobs_usage(self):
+        """
+        Verify that a single exechost_periodic event gathers the usage
+        counters of all the running jobs and reports them in
+        resources_used
+        """
+        if not self.paths[self.hosts_list[0]]['memory']:
+            self.skipTest('Test requires memory subystem mounted')
+        conf = {'freq': 2}
+        self.server.manager(MGR_CMD_SET, HOOK, conf, self.hook_name)
+        self.load_config(self.cfg3 % ('', 'false', '', self.mem, '',
+                                      self.swapctl, ''))
+        jids = []
+        for _ in range(2):
+            a = {'Resource_List.select': '1:ncpus=1:mem=100mb:host=%s' %
+                 self.hosts_list[0]}
+            j = Job(TEST_USER, attrs=a)
+            j.create_script(self.sleep30_job)
+            jid = self.server.submit(j)
+            self.server.expect(JOB, {'job_state': 'R'}, jid)
+            self.server.status(JOB, ATTR_o, jid)
+            self.tempfile.append(j.attributes[ATTR_o])
+            jids.append(jid)
+        begin = time.time()
+        # The usage of both jobs is returned by the same call
+        lines = self.moms_list[0].log_match('gather_jobs_usage: Returning',
+                                            allmatch=True, n='ALL',
+                                            starttime=begin,
+                                            max_attempts=10, interval=2)
+        found = False
+        for (_, line) in lines:
+            if all(re.search(r"'%s': \{[^}]*'mem': \d+" % re.escape(jid),
+                             line) for jid in jids):
+                found = True
+        self.assertTrue(found, 'Usage of all jobs not gathered at once')
+        for jid in jids:
+            self.moms_list[0].log_match(
+                '%s;update_job_usage: Memory usage: mem=' % jid,
+                n='ALL', starttime=begin)
+            self.server.expect(JOB, 'resources_used.mem', op=SET, id=jid)
+
     @requirements(num_moms=3)
     def test_cgroup_release_nodes(self):
         """
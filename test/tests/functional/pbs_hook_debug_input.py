@@ -173,3 +173,235 @@ pbs.event().accept()
         search.append("pbs.server().vnode(%s).ntype=0" % self.mom.shortname)
         self.logger.info(search)
         self.match_in_debug_file(data_file_pattern, search, mom=True)
+
+    def test_mom_hook_debug_data_attribs(self):
+        """
+        Test that pbs.server().vnode() given an attribute list only
+        queries those attributes, and that repeated lookups in the
+        same hook succeed over the pooled server connection.
+        """
+        hname = "debug"
+        hook_body = """
+import pbs
+s = pbs.server()
+for i in range(5):
+    vn = s.vnode("%s", attribs=["state", "resources_available.ncpus"])
+    pbs.logmsg(pbs.LOG_DEBUG, "lookup %%d vn=%%s" %% (i, vn.name))
+pbs.event().accept()
+""" % self.mom.shortname
+        attr = {'enabled': 'true', 'event': 'execjob_begin', 'debug': 'true'}
+        self.server.create_import_hook(hname, attr, hook_body)
+
+        data_file_pattern = os.path.join(self.mom_hooks_tmp_dir,
+                                         'hook_execjob_begin_%s*.data' % hname)
+        self.remove_files_match(data_file_pattern, mom=True)
+
+        j1 = Job(TEST_USER)
+        j1.set_sleep_time(5)
+        jid = self.server.submit(j1)
+        self.server.expect(JOB, 'queue', op=UNSET, id=jid)
+        self.mom.log_match("lookup 4 vn=%s" % self.mom.shortname)
+
+        vn = "pbs.server().vnode(%s)" % self.mom.shortname
+        input_file = None
+        for item in self.du.listdir(path=self.mom_hooks_tmp_dir, sudo=True):
+            if fnmatch.fnmatch(item, data_file_pattern):
+                input_file = item
+                break
+        self.assertTrue(input_file is not None)
+        with PBSLogUtils().open_log(input_file, sudo=True) as f:
+            content = f.read().decode()
+        self.assertIn("%s.resources_available[ncpus]=" % vn, content)
+        self.assertNotIn("%s.ntype=" % vn, content)
+        self.remove_files_match(data_file_pattern, mom=True)
+
+    def test_mom_hook_debug_data_binary(self):
+        """
+        Test that a debug enabled mom hook writes its debug data in the
+        binary format when PBS_HOOK_DATA_FORMAT=binary is set in the mom's
+        environment.
+        """
+        env_file = os.path.join(self.mom.pbs_conf['PBS_HOME'],
+                                'pbs_environment')
+        self.du.set_pbs_environment(self.mom.hostname, fin=env_file,
+                                    environ={'PBS_HOOK_DATA_FORMAT':
+                                             'binary'})
+        self.addCleanup(self.mom.restart)
+        self.addCleanup(self.du.unset_pbs_environment, self.mom.hostname,
+                        fin=env_file, environ=['PBS_HOOK_DATA_FORMAT'])
+        self.mom.restart()
+
+        hname = "debug"
+        hook_body = """
+import pbs
+vn = pbs.server().vnode("%s")
+pbs.logmsg(pbs.LOG_DEBUG, "replay vn=%%s ncpus=%%s state=%%s" %%
+           (vn.name, vn.resources_available["ncpus"], vn.state))
+pbs.event().accept()
+""" % self.mom.shortname
+        attr = {'enabled': 'true', 'event': 'execjob_begin', 'debug': 'true'}
+        self.server.create_import_hook(hname, attr, hook_body)
+
+        data_file_pattern = os.path.join(self.mom_hooks_tmp_dir,
+                                         'hook_execjob_begin_%s*.data' % hname)
+        self.remove_files_match(data_file_pattern, mom=True)
+
+        j1 = Job(TEST_USER)
+        j1.set_sleep_time(5)
+        jid = self.server.submit(j1)
+        self.server.expect(JOB, 'queue', op=UNSET, id=jid)
+        msg = "replay vn=%s ncpus=" % self.mom.shortname
+        line = self.mom.log_match(msg)[1]
+        logged = line[line.index(msg):]
+
+        data_file = None
+        for item in self.du.listdir(path=self.mom_hooks_tmp_dir, sudo=True):
+            if fnmatch.fnmatch(item, data_file_pattern):
+                data_file = item
+                break
+        self.assertTrue(data_file is not None)
+        with PBSLogUtils().open_log(data_file, sudo=True) as f:
+            content = f.read()
+        self.assertTrue(content.startswith(b"PBSHOOKDATA\x01\n"))
+        self.assertIn(self.mom.shortname.encode(), content)
+        self.assertNotIn(b"pbs.server().vnode(", content)
+
+        # Replay the hook with pbs_python on the captured files. The
+        # input file names the data file as the debug output of the
+        # hook, which pbs_python truncates, so replay from a copy.
+        input_file = data_file[:-len('.data')] + '.in'
+        data_copy = self.du.create_temp_file(hostname=self.mom.hostname)
+        self.du.run_copy(self.mom.hostname, src=data_file, dest=data_copy,
+                         sudo=True)
+        replay_log = self.du.create_temp_file(hostname=self.mom.hostname)
+        pbs_python = os.path.join(self.mom.pbs_conf['PBS_EXEC'], 'bin',
+                                  'pbs_python')
+        hook_file = os.path.join(self.mom.pbs_conf['PBS_HOME'], 'mom_priv',
+                                 'hooks', '%s.PY' % hname)
+        cmd = [pbs_python, '--hook', '-i', input_file, '-s', data_copy,
+               '-l', replay_log, '-e', '0xffff', hook_file]
+        ret = self.du.run_cmd(self.mom.hostname, cmd, sudo=True)
+        self.assertEqual(ret['rc'], 0, 'pbs_python failed: %s' % ret['err'])
+        ret = self.du.cat(self.mom.hostname, replay_log, sudo=True)
+        self.assertIn(logged, '\n'.join(ret['out']))
+        self.du.rm(self.mom.hostname, [data_copy, replay_log], sudo=True)
+        self.remove_files_match(data_file_pattern, mom=True)
+
+    def test_mom_hook_vnodes_dict(self):
+        """
+        Test that pbs.server().vnodes_dict() returns the requested vnodes
+        keyed by name and leaves out unknown vnodes.
+        """
+        hname = "debug"
+        hook_body = """
+import pbs
+vnodes = pbs.server().vnodes_dict(names=["%s", "nosuchvnode"],
+                                  attribs=["comment"])
+pbs.logmsg(pbs.LOG_DEBUG, "vnodes_dict keys=%%s" %% sorted(vnodes.keys()))
+pbs.event().accept()
+""" % self.mom.shortname
+        attr = {'enabled': 'true', 'event': 'execjob_begin', 'debug': 'true'}
+        self.server.create_import_hook(hname, attr, hook_body)
+
+        j1 = Job(TEST_USER)
+        j1.set_sleep_time(5)
+        jid = self.server.submit(j1)
+        self.server.expect(JOB, 'queue', op=UNSET, id=jid)
+        self.mom.log_match("vnodes_dict keys=['%s']" % self.mom.shortname)
+
+    def test_mom_hook_pmi_vnodes(self):
+        """
+        Test that the power functions look up vnodes one by one up to
+        pmi_vnode_query_max of them and all at once above that, reuse
+        them until PBS_PMI_VNODE_CACHE_TTL expires, leave out vnodes
+        unknown to the server, and ignore a non-numeric TTL.
+        """
+        a = {'resources_available.ncpus': 1}
+        self.mom.create_vnodes(a, 20, usenatvnode=False)
+        hname = "debug"
+        hook_body = """
+import os
+import pbs
+from pbs.v1 import _pmi_utils
+
+names = ["%s[%%d]" %% i for i in range(20)]
+server = pbs.server
+queries = []
+
+
+class counting_server(object):
+    def vnode(self, name, attribs=None):
+        queries.append(1)
+        return server().vnode(name, attribs)
+
+    def vnodes_dict(self, names, attribs=None):
+        queries.append(len(names))
+        return server().vnodes_dict(names, attribs)
+
+
+def check(label, vnames, ttl):
+    os.environ["PBS_PMI_VNODE_CACHE_TTL"] = ttl
+    del queries[:]
+    found = _pmi_utils._svr_vnodes(vnames)
+    ncpus = set(str(vn.resources_available["ncpus"])
+                for vn in found.values())
+    pbs.logmsg(pbs.LOG_DEBUG, "pmi %%s found=%%d queries=%%s ncpus=%%s" %%
+               (label, len(found), queries, ",".join(sorted(ncpus))))
+
+
+pbs.server = counting_server
+try:
+    check("few", names[:3] + ["nosuchvnode"], "3600")
+    check("many", names, "3600")
+    check("cached", names[:3], "3600")
+    check("expired", names[:3], "0")
+    check("bad", names[:3], "soon")
+finally:
+    pbs.server = server
+pbs.event().accept()
+""" % self.mom.shortname
+        attr = {'enabled': 'true', 'event': 'execjob_begin'}
+        self.server.create_import_hook(hname, attr, hook_body)
+
+        start = time.time()
+        j1 = Job(TEST_USER)
+        j1.set_sleep_time(5)
+        jid = self.server.submit(j1)
+        self.server.expect(JOB, 'queue', op=UNSET, id=jid)
+        for msg in ["pmi few found=3 queries=[1, 1, 1, 1] ncpus=1",
+                    "pmi many found=20 queries=[17] ncpus=1",
+                    "pmi cached found=3 queries=[] ncpus=1",
+                    "pmi expired found=3 queries=[1, 1, 1] ncpus=1",
+                    "Bad PBS_PMI_VNODE_CACHE_TTL value soon",
+                    "pmi bad found=3 queries=[] ncpus=1"]:
+            self.mom.log_match(msg, starttime=start)
+
+    def test_mom_hook_jobs_paged(self):
+        """
+        Test that pbs.server().jobs() in a mom hook returns every job
+        when fetching them a page at a time, with only the requested
+        attributes.
+        """
+        self.server.manager(MGR_CMD_SET, SERVER, {'scheduling': 'False'})
+        jids = []
+        for _ in range(5):
+            j = Job(TEST_USER)
+            jids.append(self.server.submit(j))
+        hname = "debug"
+        hook_body = """
+import pbs
+ids = []
+comments = 0
+for j in pbs.server().jobs(attribs=["job_state"], page_size=2):
+    ids.append(j.id)
+    if j.comment is not None:
+        comments += 1
+pbs.logmsg(pbs.LOG_DEBUG, "paged jobs=%s comments=%d" %
+           (",".join(sorted(ids)), comments))
+pbs.event().accept()
+"""
+        attr = {'enabled': 'true', 'event': 'exechost_periodic',
+                'freq': 5}
+        self.server.create_import_hook(hname, attr, hook_body)
+        self.mom.log_match("paged jobs=%s comments=0" %
+                           ",".join(sorted(jids)))
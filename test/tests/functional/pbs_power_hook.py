@@ -0,0 +1,129 @@
+# coding: utf-8
+
+# Copyright (C) 1994-2021 Altair Engineering, Inc.
+# For more information, contact Altair at www.altair.com.
+#
+# This file is part of both the OpenPBS software ("OpenPBS")
+# and the PBS Professional ("PBS Pro") software.
+#
+# Open Source License Information:
+#
+# OpenPBS is free software. You can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at your
+# option) any later version.
+#
+# OpenPBS is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Affero General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Commercial License Information:
+#
+# PBS Pro is commercially licensed software that shares a common core with
+# the OpenPBS software.  For a copy of the commercial license terms and
+# conditions, go to: (http://www.pbspro.com/agreement.html) or contact the
+# Altair Legal Department.
+#
+# Altair's dual-license business model allows companies, individuals, and
+# organizations to create proprietary derivative works of OpenPBS and
+# distribute them - whether embedded or bundled with other software -
+# under a commercial license agreement.
+#
+# Use of Altair's trademarks, including but not limited to "PBS™",
+# "OpenPBS®", "PBS Professional®", and "PBS Pro™" and Altair's logos is
+# subject to Altair's trademark licensing policies.
+
+
+import json
+
+from tests.functional import *
+
+
+class TestPowerHook(TestFunctional):
+    """
+    Tests of the PBS_power hook that need no power management system
+    """
+
+    def test_queued_vnode_needs(self):
+        """
+        Test that queued_vnode_needs() of the PBS_power hook maps each
+        vnode to the earliest estimated start time of the queued jobs
+        planned on it, and looks at no more than the given number of
+        jobs estimated to start later.
+        """
+        a = {'resources_available.ncpus': 1}
+        self.mom.create_vnodes(a, 2, usenatvnode=False)
+        self.scheduler.set_sched_config({'strict_ordering': 'true all'})
+        self.server.manager(MGR_CMD_SET, SERVER, {'backfill_depth': 5})
+        running = []
+        for walltime in (1000, 2000):
+            j = Job(TEST_USER, attrs={'Resource_List.walltime': walltime})
+            j.set_sleep_time(walltime)
+            running.append(self.server.submit(j))
+        queued = []
+        for select in ('1:ncpus=1', '1:ncpus=1', '2:ncpus=1'):
+            a = {'Resource_List.select': select,
+                 'Resource_List.walltime': 100}
+            queued.append(self.server.submit(Job(TEST_USER, attrs=a)))
+        for jid in running:
+            self.server.expect(JOB, {'job_state': 'R'}, id=jid)
+        for jid in queued:
+            self.server.expect(JOB, 'estimated.start_time', op=SET, id=jid)
+        # Keep the estimates from changing while the hook looks at them
+        self.server.manager(MGR_CMD_SET, SERVER, {'scheduling': 'False'})
+
+        needs = []
+        for jid in queued:
+            st = self.server.status(JOB, ['estimated.start_time',
+                                          'estimated.exec_vnode'],
+                                    id=jid)[0]
+            start = int(time.mktime(time.strptime(
+                st['estimated.start_time'], '%c')))
+            needed = {}
+            for chunk in st['estimated.exec_vnode'].split('+'):
+                vn = chunk.strip('()').partition(':')[0]
+                needed[vn] = start
+            needs.append(needed)
+        expected = {}
+        for needed in needs:
+            for (vn, start) in needed.items():
+                if vn not in expected or start < expected[vn]:
+                    expected[vn] = start
+
+        hook_body = """
+import ast
+import json
+import os
+import time
+
+import pbs
+
+hook_file = os.path.join(pbs.get_pbs_conf()['PBS_EXEC'], 'lib', 'python',
+                         'altair', 'pbs_hooks', 'PBS_power.PY')
+with open(hook_file) as desc:
+    tree = ast.parse(desc.read())
+tree.body = [n for n in tree.body if isinstance(n, ast.FunctionDef) and
+             n.name == 'queued_vnode_needs']
+funcs = {'pbs': pbs}
+exec(compile(tree, hook_file, 'exec'), funcs)
+now = int(time.time())
+for limit in (100, 1):
+    needs = funcs['queued_vnode_needs'](limit, now)
+    needs = dict((vn, n['neededby']) for (vn, n) in needs.items())
+    pbs.logmsg(pbs.LOG_DEBUG, 'vnode needs limit=%d %s' %
+               (limit, json.dumps(needs)))
+pbs.event().accept()
+"""
+        start = time.time()
+        attr = {'enabled': 'true', 'event': 'periodic', 'freq': 10}
+        self.server.create_import_hook('needs', attr, hook_body)
+        for (limit, want) in ((100, expected), (1, needs[0])):
+            msg = 'vnode needs limit=%d ' % limit
+            line = self.server.log_match(msg, starttime=start,
+                                         max_attempts=30)[1]
+            got = json.loads(line.split(msg, 1)[1])
+            self.assertEqual(got, want)
@@ -280,3 +280,116 @@ class TestCgroupsStress(TestPerformance):
         # Check the logs one last time to ensure it passed
         self.mom.log_match(msg="IOError", starttime=now,
                            existence=False, max_attempts=10, n="ALL")
+
+    def periodic_hook_times(self, count=5):
+        """
+        Return the elapsed times of the next count exechost_periodic
+        events of the hook.
+        """
+        start = time.time()
+        time.sleep(2 * (count + 1))
+        # The exechost_periodic event type is 0x1000
+        msg = 'Hook ended: %s, event_type 4096 ' \
+              r'\(elapsed time: ([0-9.]+)\)' % self.hook_name
+        lines = self.mom.log_match(msg, regexp=True, allmatch=True,
+                                   n='ALL', starttime=start,
+                                   max_attempts=count * 2, interval=2)
+        times = [float(re.search(msg, line).group(1))
+                 for (_, line) in lines]
+        self.assertTrue(len(times) >= count,
+                        'Too few periodic hook events logged')
+        return times[:count]
+
+    @timeout(1800)
+    def test_cgroups_periodic_256_jobs(self):
+        """
+        Measure the time taken by the exechost_periodic event of the
+        cgroups hook on a node running 256 jobs, building every DEBUG4
+        message (before) and only those the MoM logs (after), with the
+        same log event mask filtering DEBUG4 out. Skipping the messages
+        must not make the hook slower.
+        """
+        njobs = 256
+        attr = {'resources_available.ncpus': njobs}
+        self.server.manager(MGR_CMD_SET, NODE, attr, self.mom.shortname)
+        # 0x3ff stops at DEBUG3 (0x200), which still logs the
+        # "Hook ended" message of periodic events
+        self.mom.add_config({'$logevent': '0x3ff'})
+        self.mom.signal('-HUP')
+        cfg = self.cfg0.replace('"periodic_resc_update"  : false',
+                                '"periodic_resc_update"  : true')
+        unchecked = cfg.replace('{', '{\n    "check_log_level"       : false,',
+                                1)
+        self.load_config(unchecked % self.swapctl)
+        self.server.manager(MGR_CMD_SET, SERVER,
+                            {'scheduling': 'False'})
+        for _ in range(njobs):
+            j = Job(TEST_USER, attrs={ATTR_l + '.select':
+                                      '1:ncpus=1:mem=8mb'})
+            j.set_sleep_time(3600)
+            self.server.submit(j)
+        self.server.manager(MGR_CMD_SET, SERVER,
+                            {'scheduling': 'True'})
+        self.server.expect(JOB, {'job_state=R': njobs}, count=True,
+                           max_attempts=120)
+        before = self.periodic_hook_times()
+        self.load_config(cfg % self.swapctl)
+        after = self.periodic_hook_times()
+        self.logger.info('periodic hook times, DEBUG4 built: %s' % before)
+        self.logger.info('periodic hook times, DEBUG4 skipped: %s' % after)
+        self.perf_test_result(before, 'periodic_256_jobs_debug4_built', 'sec')
+        self.perf_test_result(after, 'periodic_256_jobs_debug4_skipped',
+                              'sec')
+        # Allow 10% for the noise between runs
+        self.assertLessEqual(sum(after), sum(before) * 1.1)
+
+    @timeout(600)
+    def test_cgroups_attach_512_processes(self):
+        """
+        Measure the time taken by the execjob_attach event of the cgroups
+        hook to move a session of 512 processes, started outside of the
+        job, into the job cgroups, and check that they all got there.
+        """
+        nprocs = 512
+        # Tells the processes of the session from any other sleep
+        marker = 'sleep 3017'
+        pbs_attach = os.path.join(self.server.pbs_conf['PBS_EXEC'],
+                                  'bin', 'pbs_attach')
+        self.mom.add_config({'$logevent': '0x3ff'})
+        self.mom.signal('-HUP')
+        j = Job(TEST_USER)
+        j.set_sleep_time(600)
+        jid = self.server.submit(j)
+        self.server.expect(JOB, {'job_state': 'R'}, id=jid)
+        # The session leader attaches its session once all its children
+        # are started, pbs_attach then gets the session ID from it
+        cmd = "nohup setsid bash -c 'for i in $(seq %d); do %s & done; " \
+              "%s -j %s -p $$; wait' >/dev/null 2>&1 &" \
+              % (nprocs - 1, marker, pbs_attach, jid)
+        start = time.time()
+        self.du.run_cmd(self.mom.shortname, cmd, runas=TEST_USER,
+                        as_script=True)
+        # The execjob_attach event type is 0x4000
+        msg = r'Hook ended: %s, job ID %s, event_type 16384 ' \
+              r'\(elapsed time: ([0-9.]+)\)'
+        msg = msg % (self.hook_name, re.escape(jid))
+        lines = self.mom.log_match(msg, regexp=True, allmatch=True,
+                                   n='ALL', starttime=start,
+                                   max_attempts=30, interval=2)
+        elapsed = float(re.search(msg, lines[-1][1]).group(1))
+        self.logger.info('attach of %d processes: %s sec' %
+                         (nprocs, elapsed))
+        procs = os.path.join(self.paths['memory'], 'pbs_jobs.service',
+                             'jobid', jid, 'cgroup.procs')
+        result = self.du.cat(hostname=self.mom.shortname, filename=procs,
+                             sudo=True)
+        self.assertEqual(result['rc'], 0, 'Could not read %s' % procs)
+        in_cgroup = set([x.strip() for x in result['out']])
+        result = self.du.run_cmd(self.mom.shortname,
+                                 ['pgrep', '-x', '-f', marker])
+        session = set([x.strip() for x in result['out']])
+        self.assertEqual(len(session), nprocs - 1)
+        self.assertEqual(session - in_cgroup, set(),
+                         'Processes of the session not in the job cgroup')
+        self.perf_test_result(elapsed, 'attach_512_processes', 'sec')
+        self.server.delete(id=jid, wait=True)
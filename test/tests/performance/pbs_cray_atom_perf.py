@@ -0,0 +1,247 @@
+# coding: utf-8
+
+# Copyright (C) 1994-2021 Altair Engineering, Inc.
+# For more information, contact Altair at www.altair.com.
+#
+# This file is part of both the OpenPBS software ("OpenPBS")
+# and the PBS Professional ("PBS Pro") software.
+#
+# Open Source License Information:
+#
+# OpenPBS is free software. You can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at your
+# option) any later version.
+#
+# OpenPBS is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Affero General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Commercial License Information:
+#
+# PBS Pro is commercially licensed software that shares a common core with
+# the OpenPBS software.  For a copy of the commercial license terms and
+# conditions, go to: (http://www.pbspro.com/agreement.html) or contact the
+# Altair Legal Department.
+#
+# Altair's dual-license business model allows companies, individuals, and
+# organizations to create proprietary derivative works of OpenPBS and
+# distribute them - whether embedded or bundled with other software -
+# under a commercial license agreement.
+#
+# Use of Altair's trademarks, including but not limited to "PBS™",
+# "OpenPBS®", "PBS Professional®", and "PBS Pro™" and Altair's logos is
+# subject to Altair's trademark licensing policies.
+
+
+import ast
+import json
+import os
+import socket
+import subprocess
+import time
+import urllib.parse
+
+from tests.performance import *
+
+
+class TestCrayAtomPerf(TestPerformance):
+    """
+    Performance tests of the PBS_cray_atom hook, run against a local
+    stand-in for the ATOM service so that no Cray system is needed
+    """
+    # Stand-in ATOM service on a unix socket. Opening a connection
+    # takes %f seconds, as a handshake with the real service would.
+    # The first POST of a job is refused, so that execjob_begin also
+    # goes through retry_post(). GET /stats returns the requests seen.
+    atom_script = """
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn, UnixStreamServer
+
+CONNECT_DELAY = %f
+lock = threading.Lock()
+jobs = {}
+stats = {'connections': 0, 'requests': []}
+
+
+class Server(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = self.socket.accept()
+        return request, ('atom', time.time())
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        time.sleep(CONNECT_DELAY)
+        with lock:
+            stats['connections'] += 1
+        BaseHTTPRequestHandler.setup(self)
+
+    def reply(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def record(self, jobid):
+        with lock:
+            stats['requests'].append({'jobid': jobid,
+                                      'method': self.command,
+                                      'connected': self.client_address[1],
+                                      'time': time.time()})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        jobid = json.loads(self.rfile.read(length).decode())['jobid']
+        self.record(jobid)
+        with lock:
+            seen = jobs.get(jobid)
+            jobs[jobid] = True
+        if seen is None:
+            self.reply(400, {'error': 'job already registered'})
+        else:
+            self.reply(201, {'jobid': jobid})
+
+    def do_DELETE(self):
+        jobid = self.path.rsplit('/', 1)[1]
+        self.record(jobid)
+        self.reply(200, {})
+
+    def do_GET(self):
+        with lock:
+            self.reply(200, stats)
+
+    def log_message(self, *args):
+        pass
+
+
+Server(sys.argv[1], Handler).serve_forever()
+"""
+
+    def setUp(self):
+        TestPerformance.setUp(self)
+        try:
+            import requests_unixsocket
+        except ImportError:
+            self.skipTest('requests_unixsocket is not installed')
+        self.connect_delay = 0.05
+        script = self.du.create_temp_file(body=self.atom_script %
+                                          self.connect_delay)
+        self.sock = self.du.create_temp_file()
+        os.unlink(self.sock)
+        self.atom = subprocess.Popen(['python3', script, self.sock])
+        self.addCleanup(self.atom.kill)
+        for _ in range(50):
+            if os.path.exists(self.sock):
+                break
+            time.sleep(0.1)
+        cfg = {'post_timeout': 30, 'delete_timeout': 30,
+               'unix_socket_file': self.sock}
+        fn = self.du.create_temp_file(body=json.dumps(cfg))
+        a = {'content-type': 'application/x-config',
+             'content-encoding': 'default',
+             'input-file': fn}
+        self.server.manager(MGR_CMD_IMPORT, PBS_HOOK, a, 'PBS_cray_atom')
+        self.server.manager(MGR_CMD_SET, PBS_HOOK, {'enabled': 'True'},
+                            id='PBS_cray_atom')
+
+    def atom_stats(self):
+        """
+        Return the requests seen by the stand-in ATOM service
+        """
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.connect(self.sock)
+        conn.sendall(b'GET /stats HTTP/1.0\r\n\r\n')
+        data = b''
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        conn.close()
+        return json.loads(data.decode().split('\r\n\r\n', 1)[1])
+
+    def test_atom_session_reuses_connection(self):
+        """
+        Check that requests for different jobs sent through the adapter
+        of the PBS_cray_atom hook share one connection to the ATOM
+        service
+        """
+        import requests
+        import requests_unixsocket
+        import urllib3
+        hook_file = os.path.join(self.server.pbs_conf['PBS_EXEC'], 'lib',
+                                 'python', 'altair', 'pbs_hooks',
+                                 'PBS_cray_atom.PY')
+        with open(hook_file) as desc:
+            tree = ast.parse(desc.read())
+        tree.body = [n for n in tree.body if isinstance(n, ast.ClassDef) and
+                     n.name in ('SocketConnectionPool', 'SocketAdapter')]
+        classes = {'requests': requests,
+                   'requests_unixsocket': requests_unixsocket,
+                   'urllib3': urllib3, 'urllib': urllib}
+        exec(compile(tree, hook_file, 'exec'), classes)
+        session = requests.Session()
+        session.mount('http+unix://', classes['SocketAdapter']())
+        url = 'http+unix://%s/rm/v1/jobs/' % urllib.parse.quote(self.sock,
+                                                                safe='')
+        jobids = ['reuse1.pbs', 'reuse2.pbs']
+        for jobid in jobids:
+            r = session.delete(url + jobid, timeout=30)
+            self.assertEqual(r.status_code, 200)
+        session.close()
+        seen = [req for req in self.atom_stats()['requests']
+                if req['jobid'] in jobids]
+        self.assertEqual(len(seen), 2)
+        self.assertEqual(len(set(req['connected'] for req in seen)), 1)
+
+    @timeout(1800)
+    def test_atom_job_begin_latency(self):
+        """
+        Measure the time the execjob_begin event of the PBS_cray_atom
+        hook spends talking to the ATOM service for 100 jobs, each going
+        through a refused POST, a DELETE and a second POST. The three
+        requests of an event must share a single connection.
+        """
+        njobs = 100
+        a = {'resources_available.ncpus': njobs}
+        self.mom.create_vnodes(a, 1, usenatvnode=True)
+        self.server.manager(MGR_CMD_SET, SERVER, {'scheduling': 'False'})
+        for _ in range(njobs):
+            j = Job(TEST_USER, attrs={'Resource_List.select': '1:ncpus=1'})
+            j.set_sleep_time(3600)
+            self.server.submit(j)
+        start = time.time()
+        self.server.manager(MGR_CMD_SET, SERVER, {'scheduling': 'True'})
+        self.server.expect(JOB, {'job_state=R': njobs}, count=True,
+                           max_attempts=300, interval=1)
+        elapsed = time.time() - start
+        requests = {}
+        for req in self.atom_stats()['requests']:
+            requests.setdefault(req['jobid'], []).append(req)
+        latency = []
+        connections = []
+        for reqs in requests.values():
+            begin = reqs[:3]
+            self.assertEqual([r['method'] for r in begin],
+                             ['POST', 'DELETE', 'POST'])
+            latency.append(begin[-1]['time'] - begin[0]['connected'])
+            connections.append(len(set(r['connected'] for r in begin)))
+        self.assertEqual(len(latency), njobs)
+        self.perf_test_result(latency, "atom_job_begin_latency", "sec")
+        self.perf_test_result(elapsed, "atom_100_jobs_start_time", "sec")
+        self.assertEqual(max(connections), 1)
@@ -0,0 +1,270 @@
+# coding: utf-8
+
+# Copyright (C) 1994-2021 Altair Engineering, Inc.
+# For more information, contact Altair at www.altair.com.
+#
+# This file is part of both the OpenPBS software ("OpenPBS")
+# and the PBS Professional ("PBS Pro") software.
+#
+# Open Source License Information:
+#
+# OpenPBS is free software. You can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at your
+# option) any later version.
+#
+# OpenPBS is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Affero General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Commercial License Information:
+#
+# PBS Pro is commercially licensed software that shares a common core with
+# the OpenPBS software.  For a copy of the commercial license terms and
+# conditions, go to: (http://www.pbspro.com/agreement.html) or contact the
+# Altair Legal Department.
+#
+# Altair's dual-license business model allows companies, individuals, and
+# organizations to create proprietary derivative works of OpenPBS and
+# distribute them - whether embedded or bundled with other software -
+# under a commercial license agreement.
+#
+
+
+import re
+import time
+
+from tests.performance import *
+
+
+class TestHookPerf(TestPerformance):
+    """
+    Performance tests of the PBS hook infrastructure
+    """
+
+    def rss_per_event(self, hook_body, num_events, event='queuejob'):
+        """
+        Create a hook from 'hook_body' logging "rss=<kB>", trigger it
+        'num_events' times by submitting jobs, and return the list of RSS
+        values (in kB) the hook logged.
+        """
+        attr = {'enabled': 'true', 'event': event}
+        self.server.create_import_hook('perf', attr, hook_body)
+        start = time.time()
+        for _ in range(num_events):
+            j = Job(TEST_USER)
+            j.set_sleep_time(1)
+            self.server.submit(j)
+        out = self.server.log_match("rss=[0-9]+", n='ALL', regexp=True,
+                                    allmatch=True, starttime=start)
+        rss = []
+        for _, line in out:
+            rss.append(int(line.split('rss=')[1].split()[0]))
+        self.assertEqual(len(rss), num_events)
+        return rss
+
+    @timeout(1200)
+    def test_job_object_memory(self):
+        """
+        Instantiate 100k job objects in each of several queuejob events
+        and check that the server's embedded interpreter does not keep
+        them alive from one event to the next.
+        """
+        hook_body = """
+import pbs
+jcls = type(pbs.event().job)
+for i in range(100000):
+    j = jcls("%d.perf" % i)
+    j.comment = "perf"
+rss = 0
+with open("/proc/self/status") as f:
+    for line in f:
+        if line.startswith("VmRSS:"):
+            rss = int(line.split()[1])
+pbs.logmsg(pbs.LOG_DEBUG, "rss=%d" % rss)
+pbs.event().accept()
+"""
+        self.server.manager(MGR_CMD_SET, SERVER,
+                            {'python_restart_max_hooks': 1000000,
+                             'python_restart_max_objects': 100000000})
+        rss = self.rss_per_event(hook_body, 5)
+        self.perf_test_result(rss, "server_rss_100k_job_objects", "kB")
+        # the first events grow the heap, later events must reuse that
+        # memory rather than keep another 100k objects (~100MB) each time
+        growth = rss[-1] - rss[1]
+        self.logger.info("RSS per event: %s, growth: %d kB" % (rss, growth))
+        self.assertLess(growth, 20480)
+
+    @timeout(1200)
+    def test_mom_hook_job_stat(self):
+        """
+        Fetch a job from the server 1000 times in a MoM hook while
+        reading a single attribute, keeping the objects, and compare
+        the time and RSS this takes against decoding all the attributes
+        of each object as was done before they were decoded lazily.
+        """
+        a = {'Resource_List.select': '1:ncpus=1', 'Variable_List': 'A=' +
+             ','.join(['V%d=%d' % (i, i) for i in range(200)])}
+        j = Job(TEST_USER, attrs=a)
+        j.set_sleep_time(1000)
+        jid = self.server.submit(j)
+        self.server.expect(JOB, {'job_state': 'R'}, id=jid)
+        hook_body = """
+import pbs
+import time
+from pbs.v1._base_types import PbsAttributeDescriptor, pbs_resource
+
+def rss():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+def decode_all(o):
+    for d in list(vars(type(o)).values()):
+        if isinstance(d, PbsAttributeDescriptor) and d._is_set(o):
+            v = d.__get__(o)
+            if isinstance(v, pbs_resource):
+                decode_all(v)
+
+def stat_jobs(eager):
+    jobs = []
+    rss_start = rss()
+    start = time.time()
+    for _ in range(1000):
+        j = pbs.server().job("%s")
+        s = j.job_state
+        if eager:
+            decode_all(j)
+        jobs.append(j)
+    return (jobs, time.time() - start, rss() - rss_start)
+
+(lazy, lazy_secs, lazy_kb) = stat_jobs(False)
+(eager, eager_secs, eager_kb) = stat_jobs(True)
+pbs.logmsg(pbs.LOG_DEBUG, "lazy_secs=%%f eager_secs=%%f "
+           "lazy_kb=%%d eager_kb=%%d"
+           %% (lazy_secs, eager_secs, lazy_kb, eager_kb))
+pbs.event().accept()
+""" % jid
+        attr = {'enabled': 'true', 'event': 'exechost_periodic', 'freq': 5}
+        start = time.time()
+        self.server.create_import_hook('perf', attr, hook_body)
+        out = self.mom.log_match("lazy_secs=", starttime=start,
+                                 max_attempts=60)
+        m = re.search(r'lazy_secs=([0-9.]+) eager_secs=([0-9.]+) '
+                      r'lazy_kb=(-?[0-9]+) eager_kb=(-?[0-9]+)', out[1])
+        (lazy_secs, eager_secs) = (float(m.group(1)), float(m.group(2)))
+        (lazy_kb, eager_kb) = (int(m.group(3)), int(m.group(4)))
+        self.perf_test_result(lazy_secs, "mom_hook_1000_job_stats", "sec")
+        self.perf_test_result(eager_secs, "mom_hook_1000_job_stats_decoded",
+                              "sec")
+        self.perf_test_result(lazy_kb, "mom_hook_1000_job_stats_rss", "kB")
+        self.perf_test_result(eager_kb,
+                              "mom_hook_1000_job_stats_decoded_rss", "kB")
+        self.assertLess(lazy_secs, eager_secs)
+        self.assertLess(lazy_kb, eager_kb)
+
+    @timeout(600)
+    def test_wide_exec_vnode(self):
+        """
+        Time building a 4096 chunk pbs.exec_vnode value in a hook and
+        reading it back as a string, which must not parse the chunks,
+        against the former eager parse of every chunk, and then the
+        first access to its chunks.
+        """
+        hook_body = """
+import pbs
+import time
+from pbs.v1._base_types import vchunk
+ev_str = "+".join(["(vn[%d]:ncpus=1:mem=1gb)" % i for i in range(4096)])
+start = time.time()
+ev = pbs.exec_vnode(ev_str)
+s = str(ev)
+t_build = time.time() - start
+start = time.time()
+ev_old = pbs.exec_vnode(ev_str)
+old = [vchunk(v.strip("(").strip(")")) for v in ev_str.split("+")]
+s = str(ev_old)
+t_old = time.time() - start
+start = time.time()
+names = [c.vnode_name for c in ev.chunks]
+t_chunks = time.time() - start
+match = names == [c.vnode_name for c in old]
+pbs.logmsg(pbs.LOG_DEBUG, "build_secs=%f old_secs=%f chunks_secs=%f match=%s"
+           % (t_build, t_old, t_chunks, match))
+pbs.event().accept()
+"""
+        attr = {'enabled': 'true', 'event': 'queuejob'}
+        self.server.create_import_hook('perf', attr, hook_body)
+        start = time.time()
+        self.server.submit(Job(TEST_USER))
+        out = self.server.log_match("build_secs=", starttime=start)
+        m = re.search(r'build_secs=([0-9.]+) old_secs=([0-9.]+) '
+                      r'chunks_secs=([0-9.]+) match=(\w+)', out[1])
+        self.assertEqual(m.group(4), 'True')
+        self.perf_test_result(float(m.group(1)),
+                              "exec_vnode_4096_chunks_build", "sec")
+        self.perf_test_result(float(m.group(2)),
+                              "exec_vnode_4096_chunks_build_eager", "sec")
+        self.perf_test_result(float(m.group(3)),
+                              "exec_vnode_4096_chunks_names", "sec")
+        self.assertLess(float(m.group(1)), float(m.group(2)))
+
+    @timeout(600)
+    def test_size_compare(self):
+        """
+        Time pbs.size comparisons and additions in a hook, against the
+        former transform_sizes() based comparison.
+        """
+        hook_body = """
+import pbs
+import time
+from pbs.v1._base_types import transform_sizes
+sizes = [pbs.size("%dmb" % i) for i in range(1, 1001)]
+limit = pbs.size("500mb")
+
+def legacy_lt(a, b):
+    so = transform_sizes(a, b)
+    s_str = str(so[0]).rstrip("bB")
+    o_str = str(so[1]).rstrip("bB")
+    if s_str.isdigit() and o_str.isdigit():
+        return int(s_str) < int(o_str)
+    return so[0].__lt__(so[1])
+
+start = time.time()
+for _ in range(100):
+    n_new = len([sz for sz in sizes if sz < limit])
+t_new = time.time() - start
+start = time.time()
+for _ in range(100):
+    n_old = len([sz for sz in sizes if legacy_lt(sz, limit)])
+t_old = time.time() - start
+start = time.time()
+total = pbs.size(0)
+for sz in sizes:
+    total = total + sz
+t_add = time.time() - start
+pbs.logmsg(pbs.LOG_DEBUG, "new_secs=%f old_secs=%f add_secs=%f match=%s"
+           % (t_new, t_old, t_add, n_new == n_old and total == 500500 * 2**20))
+pbs.event().accept()
+"""
+        attr = {'enabled': 'true', 'event': 'queuejob'}
+        self.server.create_import_hook('perf', attr, hook_body)
+        start = time.time()
+        self.server.submit(Job(TEST_USER))
+        out = self.server.log_match("new_secs=", starttime=start)
+        m = re.search(r'new_secs=([0-9.]+) old_secs=([0-9.]+) '
+                      r'add_secs=([0-9.]+) match=(\w+)', out[1])
+        self.assertEqual(m.group(4), 'True')
+        self.perf_test_result(float(m.group(1)),
+                              "size_compare_100k", "sec")
+        self.perf_test_result(float(m.group(2)),
+                              "size_compare_100k_transform_sizes", "sec")
+        self.perf_test_result(float(m.group(3)),
+                              "size_add_1k", "sec")
+        self.assertLess(float(m.group(1)), float(m.group(2)))
@@ -0,0 +1,176 @@
+# coding: utf-8
+
+# Copyright (C) 1994-2021 Altair Engineering, Inc.
+# For more information, contact Altair at www.altair.com.
+#
+# This file is part of both the OpenPBS software ("OpenPBS")
+# and the PBS Professional ("PBS Pro") software.
+#
+# Open Source License Information:
+#
+# OpenPBS is free software. You can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at your
+# option) any later version.
+#
+# OpenPBS is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Affero General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Commercial License Information:
+#
+# PBS Pro is commercially licensed software that shares a common core with
+# the OpenPBS software.  For a copy of the commercial license terms and
+# conditions, go to: (http://www.pbspro.com/agreement.html) or contact the
+# Altair Legal Department.
+#
+# Altair's dual-license business model allows companies, individuals, and
+# organizations to create proprietary derivative works of OpenPBS and
+# distribute them - whether embedded or bundled with other software -
+# under a commercial license agreement.
+#
+# Use of Altair's trademarks, including but not limited to "PBS™",
+# "OpenPBS®", "PBS Professional®", and "PBS Pro™" and Altair's logos is
+# subject to Altair's trademark licensing policies.
+
+import os
+import time
+
+from tests.performance import *
+
+
+class TestPowerCrayPerf(TestPerformance):
+    """
+    Performance tests of the Cray power management interface, run
+    against a stand-in for capmc so that no Cray system is needed
+    """
+    # Fake capmc: every nid uses 1000J per second since the epoch, and
+    # get_node_energy_counter takes %d seconds as on a large system.
+    capmc_script = """#!/usr/bin/env python3
+import json
+import sys
+import time
+
+nids = []
+if '--nids' in sys.argv:
+    for part in sys.argv[sys.argv.index('--nids') + 1].split(','):
+        first, _, last = part.partition('-')
+        nids.extend(range(int(first), int(last or first) + 1))
+out = {'e': 0, 'err_msg': ''}
+if sys.argv[1] == 'get_node_energy_counter':
+    time.sleep(%d)
+    now = int(time.time())
+    out['nid_count'] = len(nids)
+    out['nodes'] = [{'nid': nid, 'energy_ctr': now * 1000}
+                    for nid in nids]
+print(json.dumps(out))
+"""
+
+    def setUp(self):
+        TestPerformance.setUp(self)
+        self.capmc_delay = 5
+        fn = self.du.create_temp_file(hostname=self.mom.hostname,
+                                      body=self.capmc_script %
+                                      self.capmc_delay)
+        self.du.chmod(hostname=self.mom.hostname, path=fn, mode=0o755,
+                      sudo=True)
+        env_file = os.path.join(self.mom.pbs_conf['PBS_HOME'],
+                                'pbs_environment')
+        environ = {'PBS_PMINAME': 'cray', 'PBS_PMI_CAPMC': fn}
+        self.du.set_pbs_environment(self.mom.hostname, fin=env_file,
+                                    environ=environ)
+        self.addCleanup(self.mom.restart)
+        self.addCleanup(self.du.unset_pbs_environment, self.mom.hostname,
+                        fin=env_file, environ=list(environ.keys()))
+        # 0x3ff logs the "started" and "finished" messages of hooks
+        self.mom.add_config({'$logevent': '0x3ff'})
+        self.mom.restart()
+        self.server.manager(MGR_CMD_CREATE, RSC,
+                            {'type': 'string', 'flag': 'h'},
+                            id='PBScraynid')
+
+    def enable_power(self, freq):
+        """
+        Enable the PBS_power hook with its exechost_periodic event
+        running every freq seconds.
+        """
+        start = time.time()
+        a = {'enabled': 'True', 'freq': freq}
+        self.server.manager(MGR_CMD_SET, PBS_HOOK, a, id='PBS_power',
+                            sudo=True)
+        self.mom.log_match('Hook;PBS_power.HK;copy hook-related file '
+                           'request received', starttime=start,
+                           max_attempts=60)
+        self.mom.signal('-HUP')
+
+    def hook_run_times(self, hook_name, start, count):
+        """
+        Return the run times, in seconds, of the first count events of
+        hook_name logged by the MoM after start. A background event such
+        as exechost_periodic logs "finished" once when it is forked and
+        again when it completes, so an event ends with the last
+        "finished" message before the next "started" one (to the
+        second).
+        """
+        stamps = {}
+        for msg in ['started', 'finished']:
+            lines = self.mom.log_match('Hook;%s;%s' % (hook_name, msg),
+                                       allmatch=True, n='ALL',
+                                       starttime=start,
+                                       max_attempts=count * 2, interval=2)
+            stamps[msg] = [time.mktime(time.strptime(line.split(';')[0],
+                                                     '%m/%d/%Y %H:%M:%S'))
+                           for (_, line) in lines]
+        started = stamps['started']
+        times = []
+        for (begin, after) in zip(started, started[1:]):
+            ends = [end for end in stamps['finished']
+                    if begin <= end <= after]
+            if ends:
+                times.append(max(ends) - begin)
+        self.assertTrue(len(times) >= count,
+                        'Too few %s hook events logged' % hook_name)
+        return times[:count]
+
+    @timeout(3600)
+    def test_cray_periodic_energy_256_jobs(self):
+        """
+        Measure the time taken by the exechost_periodic event of the
+        PBS_power hook gathering the energy used by 256 jobs, each on
+        its own nid. The capmc sampling runs in the background, so the
+        event must not wait for the slow capmc, and the energy it
+        sampled must still reach the jobs.
+        """
+        njobs = 256
+        a = {'resources_available.ncpus': 1,
+             'resources_available.eoe': 'high'}
+        self.mom.create_vnodes(a, njobs, usenatvnode=False)
+        for i in range(njobs):
+            self.server.manager(MGR_CMD_SET, NODE,
+                                {'power_provisioning': 'True',
+                                 'resources_available.PBScraynid': str(i)},
+                                id='%s[%d]' % (self.mom.shortname, i))
+        freq = 20
+        self.enable_power(freq)
+        self.server.manager(MGR_CMD_SET, SERVER, {'scheduling': 'False'})
+        a = {'Resource_List.select': '1:ncpus=1:eoe=high'}
+        jids = []
+        for _ in range(njobs):
+            j = Job(TEST_USER, attrs=a)
+            j.set_sleep_time(3600)
+            jids.append(self.server.submit(j))
+        self.server.manager(MGR_CMD_SET, SERVER, {'scheduling': 'True'})
+        self.server.expect(JOB, {'job_state=R': njobs}, count=True,
+                           max_attempts=300, interval=5)
+        start = time.time()
+        count = 5
+        time.sleep(freq * (count + 3))
+        times = self.hook_run_times('PBS_power', start, count)
+        self.perf_test_result(times, "power_cray_periodic_256_jobs", "sec")
+        self.assertLess(max(times), self.capmc_delay)
+        self.server.expect(JOB, 'resources_used.energy', op=SET,
+                           id=jids[0])